@@ -0,0 +1,137 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class AdjacencyIndex:
+    """Compressed sparse row (outgoing) and column (incoming) index over network edges.
+
+    Nodes are encoded as dense int32 codes, the position of the node id in the node index.
+    For a node with code ``i`` its outgoing edges are stored in
+    ``out_indptr[i]:out_indptr[i + 1]``, where ``out_indices`` holds neighbor codes and
+    ``out_edges`` holds positional edge row numbers. Incoming edges use the ``in_*`` arrays.
+    """
+
+    def __init__(self, node_index: pd.Index, origin_codes: np.ndarray, destination_codes: np.ndarray):
+        self._node_index = node_index
+        self._origin_codes = origin_codes
+        self._destination_codes = destination_codes
+        # compressed arrays are built on first use, node codes alone are enough for degree-like operations
+        self._outgoing = None
+        self._incoming = None
+
+    @classmethod
+    def from_edges(cls, node_index: pd.Index, origin_ids, destination_ids) -> 'AdjacencyIndex':
+        origin_codes = AdjacencyIndex.encode(node_index, origin_ids)
+        destination_codes = AdjacencyIndex.encode(node_index, destination_ids)
+        return cls(node_index, origin_codes, destination_codes)
+
+    @staticmethod
+    def encode(node_index: pd.Index, ids) -> np.ndarray:
+        codes = node_index.get_indexer(ids)
+        if (codes < 0).any():
+            raise KeyError('Edge ids are not in the node index')
+        return codes.astype(np.int32, copy=False)
+
+    @staticmethod
+    def _compress(codes: np.ndarray, neighbor_codes: np.ndarray, size: int) -> Tuple[np.ndarray, ...]:
+        edges = np.argsort(codes, kind='stable')
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=size), out=indptr[1:])
+        return indptr, neighbor_codes[edges], edges
+
+    def _get_outgoing(self) -> Tuple[np.ndarray, ...]:
+        if self._outgoing is None:
+            self._outgoing = AdjacencyIndex._compress(self._origin_codes, self._destination_codes,
+                                                      len(self._node_index))
+        return self._outgoing
+
+    def _get_incoming(self) -> Tuple[np.ndarray, ...]:
+        if self._incoming is None:
+            self._incoming = AdjacencyIndex._compress(self._destination_codes, self._origin_codes,
+                                                      len(self._node_index))
+        return self._incoming
+
+    @property
+    def node_index(self) -> pd.Index:
+        return self._node_index
+
+    @property
+    def origin_codes(self) -> np.ndarray:
+        return self._origin_codes
+
+    @property
+    def destination_codes(self) -> np.ndarray:
+        return self._destination_codes
+
+    @property
+    def out_indptr(self) -> np.ndarray:
+        return self._get_outgoing()[0]
+
+    @property
+    def out_indices(self) -> np.ndarray:
+        return self._get_outgoing()[1]
+
+    @property
+    def out_edges(self) -> np.ndarray:
+        return self._get_outgoing()[2]
+
+    @property
+    def in_indptr(self) -> np.ndarray:
+        return self._get_incoming()[0]
+
+    @property
+    def in_indices(self) -> np.ndarray:
+        return self._get_incoming()[1]
+
+    @property
+    def in_edges(self) -> np.ndarray:
+        return self._get_incoming()[2]
+
+    def shape(self) -> (int, int):
+        return len(self._node_index), len(self._origin_codes)
+
+    def code(self, node_id) -> int:
+        return self._node_index.get_loc(node_id)
+
+    def out_degree(self) -> np.ndarray:
+        return np.bincount(self._origin_codes, minlength=len(self._node_index))
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self._destination_codes, minlength=len(self._node_index))
+
+    def unique_pairs(self, return_inverse: bool = False):
+        """Origin and destination codes of distinct node pairs connected by at least one edge.
+
+        With return_inverse=True also returns, for every edge, the position of its pair, so values computed
+        once per pair can be broadcast back onto the edges with a take.
+        """
+        size = len(self._node_index)
+        keys = self._origin_codes.astype(np.int64) * size + self._destination_codes
+        if size * size <= 4 * len(keys):
+            # dense pair space (e.g. taxi zones), counting is cheaper than sorting
+            present = np.bincount(keys, minlength=size * size) > 0
+            pairs = np.flatnonzero(present)
+            if return_inverse:
+                inverse = (np.cumsum(present) - 1)[keys]
+        elif return_inverse:
+            pairs, inverse = np.unique(keys, return_inverse=True)
+        else:
+            pairs = np.unique(keys)
+        if return_inverse:
+            return pairs // size, pairs % size, inverse
+        return pairs // size, pairs % size
+
+    def adjacent_edges(self, node_id, outgoing: bool = True) -> np.ndarray:
+        """Positional row numbers of edges leaving (or entering) the node."""
+        indptr, _, edges = self._get_outgoing() if outgoing else self._get_incoming()
+        code = self.code(node_id)
+        return edges[indptr[code]:indptr[code + 1]]
+
+    def neighbors(self, node_id, outgoing: bool = True) -> pd.Index:
+        """Unique ids of successors (or predecessors) of the node."""
+        indptr, indices, _ = self._get_outgoing() if outgoing else self._get_incoming()
+        code = self.code(node_id)
+        codes = np.unique(indices[indptr[code]:indptr[code + 1]])
+        return self._node_index[codes]
@@ -1 +1,3 @@
+from sttn.algorithms import centrality
 from sttn.algorithms import community
+from sttn.algorithms import structure
@@ -0,0 +1,4 @@
+"""Functionality to measure node centrality in networks
+"""
+
+from sttn.algorithms.centrality.ranking import *
@@ -0,0 +1,48 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from sttn.network import SpatioTemporalNetwork
+
+__all__ = ['pagerank']
+
+
+def pagerank(network: SpatioTemporalNetwork, weight: Optional[str] = None, alpha: float = 0.85,
+             max_iter: int = 100, tol: float = 1.0e-6) -> pd.Series:
+    """PageRank of network nodes computed with power iteration over a sparse adjacency matrix.
+
+    Parallel edges are summed up into a single weighted link, which gives the same result as
+    networkx.pagerank on the network multigraph. Unlike the multigraph, nodes without edges are
+    kept and treated as dangling nodes.
+
+    Args:
+        network (SpatioTemporalNetwork): input network
+        weight (str): edge column used as a link weight, every edge counts as 1 if not set
+        alpha (float): damping factor
+        max_iter (int): maximum number of power iterations
+        tol (float): error tolerance used to check convergence
+
+    Returns:
+        pd.Series: PageRank values indexed and ordered as network nodes, the values sum up to 1
+    """
+    matrix = network.to_sparse_matrix(weight=weight)
+    size = matrix.shape[0]
+    if size == 0:
+        return pd.Series(dtype=np.float64, index=network.nodes.index, name='pagerank')
+
+    out_strength = np.asarray(matrix.sum(axis=1)).ravel()
+    is_dangling = out_strength == 0
+    inverse_strength = np.divide(1.0, out_strength, out=np.zeros(size), where=~is_dangling)
+    transition = sparse.diags(inverse_strength).dot(matrix).T.tocsr()
+
+    uniform = np.full(size, 1.0 / size)
+    ranks = uniform
+    for _ in range(max_iter):
+        previous = ranks
+        ranks = alpha * (transition.dot(previous) + previous[is_dangling].sum() * uniform) + (1 - alpha) * uniform
+        if np.abs(ranks - previous).sum() < size * tol:
+            return pd.Series(ranks, index=network.nodes.index, name='pagerank')
+
+    raise RuntimeError('PageRank failed to converge in {max_iter} iterations'.format(max_iter=max_iter))
@@ -1,14 +1,33 @@
 from typing import Optional, Tuple
 
+import networkx as nx
 import pandas as pd
 import pycombo
 
 from sttn.network import SpatioTemporalNetwork
 
+COMBO_WEIGHT = 'weight'
+
 
 def combo_communities(data: SpatioTemporalNetwork, weight: Optional[str] = None, random_seed: Optional[int] = 0, **kwargs) -> Tuple[SpatioTemporalNetwork, float]:
-    graph = data.to_multigraph()
-    partition_dict, modularity = pycombo.execute(graph, weight=weight, random_seed=random_seed, **kwargs)
+    graph = collapse_parallel_edges(data, weight=weight)
+    partition_dict, modularity = pycombo.execute(graph, weight=COMBO_WEIGHT, random_seed=random_seed, **kwargs)
     partition_df = pd.DataFrame.from_dict(partition_dict, orient='index', columns=['cluster'])
     data_with_community = data.join_node_labels(partition_df)
     return data_with_community, modularity
+
+
+def collapse_parallel_edges(data: SpatioTemporalNetwork, weight: Optional[str] = None) -> nx.DiGraph:
+    """Build a simple directed graph where parallel edges are merged into one link.
+
+    The link weight is the sum of the weight column, or the number of parallel edges if the weight is not set,
+    which is equivalent to the multigraph for modularity-based algorithms.
+    """
+    grouping = [data._origin, data._destination]
+    if weight is None:
+        links = data._plain_edges().groupby(grouping, sort=False).size()
+    else:
+        links = data._plain_edges().groupby(grouping, sort=False)[weight].sum()
+    links = links.rename(COMBO_WEIGHT).reset_index()
+    return nx.from_pandas_edgelist(links, source=data._origin, target=data._destination, edge_attr=COMBO_WEIGHT,
+                                   create_using=nx.DiGraph)
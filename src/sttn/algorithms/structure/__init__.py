@@ -0,0 +1,4 @@
+"""Functionality to measure structural properties of networks
+"""
+
+from sttn.algorithms.structure.cohesion import *
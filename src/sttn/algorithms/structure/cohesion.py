@@ -0,0 +1,91 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from sttn.network import SpatioTemporalNetwork
+
+__all__ = ['density', 'clustering', 'average_clustering']
+
+
+def density(network: SpatioTemporalNetwork, directed: bool = True) -> float:
+    """Share of node pairs connected by at least one edge.
+
+    Parallel edges are counted once, so the result matches networkx.density on the collapsed
+    (Di)Graph, self-loops are counted as links the same way networkx does.
+    """
+    size = network.nodes.shape[0]
+    if size <= 1:
+        return 0.0
+    origin_codes, destination_codes = network.adjacency.unique_pairs()
+    if directed:
+        return len(origin_codes) / (size * (size - 1))
+    undirected_pairs = np.unique(np.minimum(origin_codes, destination_codes) * size +
+                                 np.maximum(origin_codes, destination_codes))
+    return 2 * len(undirected_pairs) / (size * (size - 1))
+
+
+def clustering(network: SpatioTemporalNetwork, weight: Optional[str] = None, directed: bool = False) -> pd.Series:
+    """Local clustering coefficient of every node computed with sparse triangle counting.
+
+    Parallel edges are collapsed into a single link and their weights are summed up, for an undirected
+    network the weights of both directions are summed up as well. The formulas follow networkx.clustering:
+    geometric mean of normalized weights for weighted triangles and the Fagiolo definition for directed ones.
+    Self-loops are ignored.
+
+    Args:
+        network (SpatioTemporalNetwork): input network
+        weight (str): edge column used as a link weight, the coefficient is unweighted if not set
+        directed (bool): count directed triangles instead of treating links as undirected
+
+    Returns:
+        pd.Series: clustering coefficient indexed and ordered as network nodes
+    """
+    size = network.nodes.shape[0]
+    origin_codes, destination_codes = network.adjacency.unique_pairs()
+    links = sparse.csr_matrix((np.ones(len(origin_codes)), (origin_codes, destination_codes)), shape=(size, size))
+    weights = links if weight is None else network.to_sparse_matrix(weight=weight)
+    if not directed:
+        links = ((links + links.T) > 0).astype(np.float64)
+        # a self-loop is on the diagonal of both matrices, it is added once and can be the normalizing max
+        weights = links if weight is None else (weights + weights.T - sparse.diags(weights.diagonal())).tocsr()
+
+    if weight is not None:
+        max_weight = weights.max() if weights.nnz else 0
+        weights = weights / max_weight if max_weight > 0 else weights
+        weights = weights.power(1 / 3)
+
+    links = _drop_self_loops(links)
+    weights = _drop_self_loops(weights)
+    if directed:
+        weights = (weights + weights.T).tocsr()
+
+    triangles = _flatten(weights.dot(weights).multiply(weights).sum(axis=1))
+    if directed:
+        total_degree = _flatten(links.sum(axis=0)) + _flatten(links.sum(axis=1))
+        reciprocal = _flatten(links.multiply(links.T).sum(axis=1))
+        possible = 2 * (total_degree * (total_degree - 1) - 2 * reciprocal)
+    else:
+        node_degree = _flatten(links.sum(axis=1))
+        possible = node_degree * (node_degree - 1)
+
+    coefficient = np.divide(triangles, possible, out=np.zeros(size), where=possible > 0)
+    return pd.Series(coefficient, index=network.nodes.index, name='clustering')
+
+
+def average_clustering(network: SpatioTemporalNetwork, weight: Optional[str] = None, directed: bool = False) -> float:
+    """Average of local clustering coefficients over all network nodes, see clustering for details."""
+    coefficients = clustering(network, weight=weight, directed=directed)
+    return float(coefficients.mean()) if len(coefficients) else 0.0
+
+
+def _drop_self_loops(matrix) -> sparse.csr_matrix:
+    matrix = sparse.csr_matrix(matrix)
+    matrix = (matrix - sparse.diags(matrix.diagonal())).tocsr()
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def _flatten(matrix) -> np.ndarray:
+    return np.asarray(matrix, dtype=np.float64).ravel()
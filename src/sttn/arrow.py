@@ -0,0 +1,73 @@
+"""Arrow edge backend helpers, pyarrow compute kernels run multi-threaded over the table chunks.
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# pandas aggregation name -> arrow hash aggregation and its options
+AGGREGATIONS = {
+    # pandas sums of groups with only missing values are 0
+    'sum': ('sum', pc.ScalarAggregateOptions(min_count=0)),
+    'mean': ('mean', None),
+    'min': ('min', None),
+    'max': ('max', None),
+    'count': ('count', None),
+    'nunique': ('count_distinct', None),
+    'std': ('stddev', pc.VarianceOptions(ddof=1)),
+    'var': ('variance', pc.VarianceOptions(ddof=1)),
+}
+
+
+def index_type(node_index: pd.Index) -> pa.DataType:
+    return pa.array(node_index).type
+
+
+def types_match(left: pa.DataType, right: pa.DataType) -> bool:
+    if left == right:
+        return True
+    is_string = lambda data_type: pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+    return is_string(left) and is_string(right)
+
+
+def missing_ids(edge_ids: pa.ChunkedArray, node_index: pd.Index) -> list:
+    """Sample of edge ids which are not in the node index."""
+    value_set = pa.array(node_index).cast(edge_ids.type)
+    not_in_index = pc.filter(edge_ids, pc.invert(pc.is_in(edge_ids, value_set=value_set)))
+    return pc.unique(not_in_index)[:5].to_pylist()
+
+
+def is_in(edge_ids: pa.ChunkedArray, node_ids: pd.Index) -> pa.ChunkedArray:
+    return pc.is_in(edge_ids, value_set=pa.array(node_ids).cast(edge_ids.type))
+
+
+def to_mask(condition):
+    """Convert a boolean condition to a value accepted by pa.Table.filter."""
+    if isinstance(condition, (pc.Expression, pa.Array, pa.ChunkedArray)):
+        return condition
+    return pa.array(np.asarray(condition, dtype=bool))
+
+
+def group_by(table: pa.Table, grouping: List[str], column_aggs: dict) -> Optional[pa.Table]:
+    """Arrow equivalent of pandas groupby(grouping, as_index=False).agg(column_aggs).
+
+    Returns None if one of the aggregations has no arrow counterpart, so the caller can fall back to pandas.
+    """
+    aggregations = []
+    for column, function in column_aggs.items():
+        if not isinstance(function, str) or function not in AGGREGATIONS:
+            return None
+        arrow_function, options = AGGREGATIONS[function]
+        aggregations.append((column, arrow_function, options))
+
+    grouped = table.group_by(grouping).aggregate(aggregations)
+    for key in grouping:
+        # pandas drops groups with missing keys
+        if grouped[key].null_count > 0:
+            grouped = grouped.filter(pc.is_valid(grouped[key]))
+    columns = {key: grouped[key] for key in grouping}
+    for column, arrow_function, _ in aggregations:
+        columns[column] = grouped['{column}_{function}'.format(column=column, function=arrow_function)]
+    return pa.table(columns).sort_by([(key, 'ascending') for key in grouping])
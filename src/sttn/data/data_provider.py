@@ -3,27 +3,180 @@ import json
 import os
 import pathlib
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
+import geopandas as gpd
 import requests
 
 
 class DataProvider:
     CHUNK_SIZE = 1 << 25
+    # files larger than a part are downloaded in concurrent range requests if the server supports them
+    PART_SIZE = 1 << 26
+    DOWNLOAD_WORKERS = 4
+    TIMEOUT = 60
+    # sizes and byte ranges refer to the file itself, not to a compressed transfer encoding
+    IDENTITY = {'Accept-Encoding': 'identity'}
 
     def cache_file(self, url, local_filename=None):
+        """Download a file to the cache directory once and return its local path.
+
+        The download goes to a temporary .part file which is renamed when complete, an interrupted download is
+        resumed with an HTTP Range request. Size and ETag of the file are recorded in a .json sidecar manifest,
+        a cached file which does not match it is downloaded again. Files larger than PART_SIZE are downloaded
+        in concurrent parts when the server accepts range requests.
+        """
         if not local_filename:
             local_filename = url.split('/')[-1]
 
         pathlib.Path(self.cache_dir()).mkdir(parents=True, exist_ok=True)
         file_path = os.path.join(self.cache_dir(), local_filename)
+        manifest_path = file_path + '.json'
+
+        if os.path.exists(file_path):
+            manifest = self._read_json(manifest_path)
+            # files cached before manifests were recorded are trusted
+            if manifest is None or manifest.get('size') == os.path.getsize(file_path):
+                return file_path
+            self._reset(file_path, manifest_path)
+
+        size, etag, accepts_ranges = self._probe(url)
+        part_path = file_path + '.part'
+        progress_path = part_path + '.json'
+        if accepts_ranges and size is not None and size > self.PART_SIZE:
+            self._download_parts(url, part_path, progress_path, size, etag)
+        else:
+            self._download_stream(url, part_path, progress_path, size, etag, accepts_ranges)
+
+        downloaded_size = os.path.getsize(part_path)
+        if size is not None and downloaded_size != size:
+            raise IOError(f"Incomplete download of {url}: {downloaded_size} of {size} bytes, retry to resume")
+        os.replace(part_path, file_path)
+        self._write_json(manifest_path, {'url': url, 'size': downloaded_size, 'etag': etag})
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+        return file_path
+
+    def _probe(self, url):
+        """Size, ETag and range support of the remote file, unknown values are None/False."""
+        try:
+            with requests.head(url, allow_redirects=True, headers=self.IDENTITY, timeout=self.TIMEOUT) as r:
+                if not r.ok:
+                    return None, None, False
+                size = r.headers.get('Content-Length')
+                return (int(size) if size is not None else None, r.headers.get('ETag'),
+                        r.headers.get('Accept-Ranges', '').lower() == 'bytes')
+        except requests.RequestException:
+            return None, None, False
+
+    def _resumable(self, part_path: str, progress_path: str, progress: dict) -> bool:
+        """Check that the partial download belongs to the same remote file version and download mode."""
+        stored = self._read_json(progress_path)
+        return os.path.exists(part_path) and stored is not None and progress['etag'] is not None and all(
+            stored.get(key) == value for key, value in progress.items() if key != 'parts')
+
+    @staticmethod
+    def _reset(*paths: str) -> None:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _download_stream(self, url: str, part_path: str, progress_path: str, size: Optional[int],
+                         etag: Optional[str], accepts_ranges: bool) -> None:
+        progress = {'etag': etag, 'size': size, 'part_size': None}
+        offset = 0
+        if accepts_ranges and self._resumable(part_path, progress_path, progress):
+            offset = os.path.getsize(part_path)
+        else:
+            self._reset(part_path, progress_path)
+        if size is not None and offset == size:
+            return
+        self._write_json(progress_path, progress)
+
+        headers = dict(self.IDENTITY)
+        if offset:
+            # If-Range makes the server send the whole file if it changed since the partial download
+            headers.update({'Range': f'bytes={offset}-', 'If-Range': etag})
+        with requests.get(url, stream=True, headers=headers, timeout=self.TIMEOUT) as r:
+            r.raise_for_status()
+            mode = 'ab' if offset and r.status_code == 206 else 'wb'
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=self.CHUNK_SIZE):
+                    f.write(chunk)
 
-        if not os.path.exists(file_path):
-            with requests.get(url, stream=True) as r:
+    def _download_parts(self, url: str, part_path: str, progress_path: str, size: int, etag: Optional[str]) -> None:
+        progress = {'etag': etag, 'size': size, 'part_size': self.PART_SIZE, 'parts': []}
+        if self._resumable(part_path, progress_path, progress):
+            progress['parts'] = self._read_json(progress_path)['parts']
+        else:
+            self._reset(part_path, progress_path)
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+            self._write_json(progress_path, progress)
+
+        done = set(progress['parts'])
+        lock = threading.Lock()
+
+        def download_part(index: int) -> None:
+            start = index * self.PART_SIZE
+            end = min(start + self.PART_SIZE, size) - 1
+            headers = {**self.IDENTITY, 'Range': f'bytes={start}-{end}'}
+            if etag is not None:
+                headers['If-Range'] = etag
+            with requests.get(url, stream=True, headers=headers, timeout=self.TIMEOUT) as r:
                 r.raise_for_status()
-                with open(file_path, 'wb') as f:
+                if r.status_code != 206:
+                    raise IOError(f"Range request for {url} was not honored, the file may have changed")
+                with open(part_path, 'r+b') as f:
+                    f.seek(start)
                     for chunk in r.iter_content(chunk_size=self.CHUNK_SIZE):
                         f.write(chunk)
-        return file_path
+                    if f.tell() != end + 1:
+                        raise IOError(f"Incomplete part {index} of {url}, retry to resume")
+            with lock:
+                done.add(index)
+                self._write_json(progress_path, {**progress, 'parts': sorted(done)})
+
+        parts = (size + self.PART_SIZE - 1) // self.PART_SIZE
+        with ThreadPoolExecutor(max_workers=self.DOWNLOAD_WORKERS) as pool:
+            list(pool.map(download_part, [index for index in range(parts) if index not in done]))
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[dict]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _write_json(path: str, content: dict) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(content, f)
+        os.replace(tmp_path, path)
+
+    def cache_geometry(self, url, local_filename=None, crs: str = 'EPSG:4326') -> gpd.GeoDataFrame:
+        """Download and parse a vector file (e.g. a zipped shapefile) once and cache it as GeoParquet in the crs.
+
+        Later calls only read the GeoParquet file, without downloading or parsing the source again.
+        """
+        file_path = os.path.join(self.cache_dir(), self.hash_args(url=url, crs=crs) + '.geoparquet')
+        if os.path.exists(file_path):
+            return gpd.read_parquet(file_path)
+
+        shapes = gpd.read_file(self.cache_file(url, local_filename))
+        if shapes.crs is not None:
+            shapes = shapes.to_crs(crs)
+        # write to a temporary file in order to avoid incomplete results
+        tmp_file_path = file_path + '.tmp'
+        shapes.to_parquet(tmp_file_path)
+        os.replace(tmp_file_path, file_path)
+        return shapes
 
     def cache_dir(self) -> str:
         home = '/content/drive/MyDrive' if 'google.colab' in sys.modules else pathlib.Path.home()
@@ -1,4 +1,3 @@
-import geopandas as gpd
 import numpy as np
 import pandas as pd
 
@@ -36,7 +35,7 @@ class OriginDestinationEmploymentDataProvider(DataProvider):
         tract_to_zip = renamed[renamed.zip != 99999].groupby('id').first()
         tract_to_zip['zip'] = tract_to_zip['zip'].astype(str)
         tract_geo_columns = ['GEOID', 'geometry']
-        tract_shapes = gpd.read_file(self.tract_shapes_fname)
+        tract_shapes = self.tract_shapes.copy()
         tract_shapes.GEOID = tract_shapes.GEOID.astype(np.int64)  # np.int64 to fix windows C long issue
         # filter out water-only tracts:
         filtered_tracts = tract_shapes[tract_shapes.ALAND > 0]
@@ -99,4 +98,4 @@ class OriginDestinationEmploymentDataProvider(DataProvider):
         self.xwalk_fname = self.cache_file(xwalk_url)
 
         tract_shapes_url = census.get_tract_geo_url(state=state, year=year)
-        self.tract_shapes_fname = self.cache_file(tract_shapes_url)
+        self.tract_shapes = self.cache_geometry(tract_shapes_url)
@@ -1,10 +1,13 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import List, Optional, Tuple, Union
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
 import pyarrow as pa
+import pyarrow.dataset as ds
 import pyarrow.parquet
 from dateutil.relativedelta import relativedelta
 
@@ -12,6 +15,23 @@ from sttn import network
 from .data_provider import DataProvider
 
 TAXI_ZONE_SHAPE_URL = 'https://d37ci6vzurychx.cloudfront.net/misc/taxi_zones.zip'
+ZIP_CODE_SHAPE_URL = ('https://data.cityofnewyork.us/api/views/i8iw-xf4u/files/'
+                      'YObIR0MbpUVA0EpQzZSq5x55FzKGM2ejSeahdvjqR20?filename=ZIP_CODE_040114.zip')
+# source trip columns of every taxi type, mapped to the uniform edge columns
+TRIP_COLUMNS = {
+    'yellow': {'origin': 'PULocationID', 'destination': 'DOLocationID', 'time': 'tpep_pickup_datetime',
+               'passenger_count': 'passenger_count', 'fare_amount': 'fare_amount'},
+    'green': {'origin': 'PULocationID', 'destination': 'DOLocationID', 'time': 'lpep_pickup_datetime',
+              'passenger_count': 'passenger_count', 'fare_amount': 'fare_amount'},
+    'fhv': {'origin': 'PUlocationID', 'destination': 'DOlocationID', 'time': 'pickup_datetime'},
+    'fhvhv': {'origin': 'PULocationID', 'destination': 'DOLocationID', 'time': 'pickup_datetime',
+              'fare_amount': 'base_passenger_fare'},
+}
+EDGE_TYPES = {'origin': pa.int64(), 'destination': pa.int64(), 'time': pa.timestamp('us'),
+              'passenger_count': pa.int16(), 'fare_amount': pa.float64()}
+# taxi zone ids, 264 and 265 are unknown zones
+MIN_ZONE_ID = 1
+MAX_ZONE_ID = 263
 
 
 class NycTaxiDataProvider(DataProvider):
@@ -29,18 +49,49 @@ class NycTaxiDataProvider(DataProvider):
         taxi_zones = taxi_zones.set_index('id')
         return network.SpatioTemporalNetwork(nodes=taxi_zones, edges=edges_casted)
 
-    def get_data(self, taxi_type: str, month: str) -> network.SpatioTemporalNetwork:
+    @staticmethod
+    def read_trips(taxi_data, from_date: datetime, to_date: datetime, taxi_type: str = 'yellow') -> pa.Table:
+        """Scan trip Parquet file(s) of one taxi type with the zone id and pickup time filters pushed down into the scan.
+
+        Only the columns mapped in TRIP_COLUMNS are read and renamed to the uniform edge columns, columns the taxi
+        type does not have are null. Row groups are read in parallel and columns are cast to the edge types while
+        scanning, rows with a missing mapped value are skipped.
+        """
+        if taxi_type not in TRIP_COLUMNS:
+            raise ValueError(f"Unknown taxi type {taxi_type}, expected one of {list(TRIP_COLUMNS)}")
+        source_columns = TRIP_COLUMNS[taxi_type]
+        dataset = ds.dataset(taxi_data, format='parquet')
+        columns = {}
+        for column, column_type in EDGE_TYPES.items():
+            if column in source_columns:
+                columns[column] = ds.field(source_columns[column]).cast(column_type)
+            else:
+                columns[column] = ds.scalar(pa.scalar(None, type=column_type))
+
+        time = ds.field(source_columns['time'])
+        condition = (time >= from_date) & (time <= to_date)
+        for column in ('origin', 'destination'):
+            condition &= (ds.field(source_columns[column]) >= MIN_ZONE_ID) & (
+                    ds.field(source_columns[column]) <= MAX_ZONE_ID)
+        for source_column in source_columns.values():
+            condition &= ds.field(source_column).is_valid()
+        return dataset.to_table(columns=columns, filter=condition, use_threads=True)
+
+    def get_data(self, taxi_type: Union[str, List[str]], month: Optional[str] = None,
+                 month_range: Optional[Tuple[str, str]] = None, max_workers: int = 4) -> network.SpatioTemporalNetwork:
         """
         Retrieves New York City taxi data
 
         Args:
-            taxi_type (str): String taxi type one of the following values:
+            taxi_type (str): String taxi type one of the following values, or a list of them:
                 'yellow' - Yellow taxi
                 'green' - Green taxi
                 'fhv' - For-Hire vehicles
                 'fhvhv' - High-volume for-hire vehicles
             month (str): A string with year and month in the "YYYY-MM" format.
                 The dataset is available from 2011 to 2023.
+            month_range (tuple): First and last month (inclusive) in the "YYYY-MM" format, instead of month.
+            max_workers (int): Maximum number of concurrent file downloads.
 
         Returns:
             SpatioTemporalNetwork: An STTN network where nodes represent New York City taxi zones
@@ -52,28 +103,46 @@ class NycTaxiDataProvider(DataProvider):
                 columns:
                     'borough' (str) - taxi zone borough
                     'zone' (str) - taxi zone name
-                    'geometry' (shape) - shape object for the zone
+                    'geometry' (shape) - shape object for the zone in EPSG:4326
 
             The edges dataframe contains the following columns:
                 'origin' (int64) - trip origin taxi zone id
                 'destination' (int64) - trip destination taxi zone id
-                'time' (datetime64[ns]) - trip start time
-                'passenger_count' (int64) - number of passengers
-                'fare_amount' (float64) - trip fare in USD (can be negative, filter out if not stated otherwise)
+                'time' (datetime64[us]) - trip start time
+                'passenger_count' (int16) - number of passengers, missing for fhv and fhvhv trips
+                'fare_amount' (float64) - trip fare in USD (can be negative, filter out if not stated otherwise),
+                    base passenger fare for fhvhv trips, missing for fhv trips
+                'taxi_type' (category) - taxi type of the trip, only if taxi_type is a list
         """
-        url = f'https://d37ci6vzurychx.cloudfront.net/trip-data/{taxi_type}_tripdata_{month}.parquet'
-        taxi_data = self.cache_file(url)
-        column_names = ['PULocationID', 'DOLocationID', 'tpep_pickup_datetime', 'passenger_count', 'fare_amount']
-        df = pd.read_parquet(taxi_data, columns=column_names)
-        df = df[(df['PULocationID'] > 0) & (df['PULocationID'] < 264)]
-        df = df[(df['DOLocationID'] > 0) & (df['DOLocationID'] < 264)]
-        df = df.dropna()
-
-        from_date = datetime.strptime(month, '%Y-%m')
-        to_date = from_date + relativedelta(months=1)
-        df = df[(df['tpep_pickup_datetime'] >= from_date) & (df['tpep_pickup_datetime'] <= to_date)]
-        df['passenger_count'] = df['passenger_count'].astype(int)
-        labels = gpd.read_file(TAXI_ZONE_SHAPE_URL)
+        if (month is None) == (month_range is None):
+            raise ValueError('Exactly one of month and month_range has to be set')
+        first_month, last_month = (month, month) if month_range is None else month_range
+        months = [str(period) for period in pd.period_range(first_month, last_month, freq='M')]
+        if not months:
+            raise ValueError(f"Empty month range: {first_month} - {last_month}")
+        taxi_types = [taxi_type] if isinstance(taxi_type, str) else list(taxi_type)
+
+        urls = {f'https://d37ci6vzurychx.cloudfront.net/trip-data/{file_type}_tripdata_{file_month}.parquet': file_type
+                for file_type in taxi_types for file_month in months}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+            files = list(pool.map(self.cache_file, urls))
+
+        from_date = datetime.strptime(first_month, '%Y-%m')
+        to_date = datetime.strptime(last_month, '%Y-%m') + relativedelta(months=1)
+        # every taxi type has its own schema, files of one type are scanned as one dataset
+        type_files = {file_type: [path for path, url_type in zip(files, urls.values()) if url_type == file_type]
+                      for file_type in taxi_types}
+        tables = []
+        for file_type, paths in type_files.items():
+            table = self.read_trips(paths, from_date, to_date, taxi_type=file_type)
+            if not isinstance(taxi_type, str):
+                type_column = pa.DictionaryArray.from_arrays(
+                    pa.array(np.full(table.num_rows, taxi_types.index(file_type), dtype=np.int8)),
+                    pa.array(taxi_types))
+                table = table.append_column('taxi_type', type_column)
+            tables.append(table)
+        df = pa.concat_tables(tables).to_pandas()
+        labels = self.cache_geometry(TAXI_ZONE_SHAPE_URL)
         return self.build_network(df, labels)
 
 
@@ -101,8 +170,7 @@ class Service311RequestsDataProvider(DataProvider):
         column_names = ['Incident Zip', 'City', 'Latitude', 'Longitude', 'Complaint Type', 'Created Date']
         filtered_file = self.filter_requests(data, from_date, to_date, column_names)
 
-        nyc_shape = gpd.read_file(
-            'https://data.cityofnewyork.us/api/views/i8iw-xf4u/files/YObIR0MbpUVA0EpQzZSq5x55FzKGM2ejSeahdvjqR20?filename=ZIP_CODE_040114.zip')
+        nyc_shape = self.cache_geometry(ZIP_CODE_SHAPE_URL, local_filename='ZIP_CODE_040114.zip')
         nyc_shape['ZIPCODE'] = nyc_shape['ZIPCODE'].astype(int)
         requests = pd.read_parquet(filtered_file)
         requests['Incident Zip'] = requests['Incident Zip'].astype(int)
@@ -0,0 +1,182 @@
+from typing import Dict, List, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from sttn import constants
+from sttn.network import SpatioTemporalNetwork
+
+# aggregation -> partial aggregates it is computed from
+PARTIALS = {'sum': ['sum'], 'count': ['count'], 'min': ['min'], 'max': ['max'], 'mean': ['sum', 'count']}
+# how partial aggregates of two batches are merged
+MERGES = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+class IncrementalNetwork:
+    """Network built from an append-only feed of edge batches.
+
+    Every batch is validated on its own against the node index and merged into running parallel edge
+    aggregates. Partial aggregates are stored in arrays addressed by a dictionary of grouping keys and only the
+    keys present in a batch are updated, so the cost of an append does not depend on the number of edges
+    or keys received before. Supported aggregations are sum, count, min, max and mean.
+
+    Args:
+        nodes (gpd.GeoDataFrame): network nodes indexed on node_id
+        column_aggs (dict): edge column -> aggregation, same as in SpatioTemporalNetwork.agg_parallel_edges
+        key (str): optional extra grouping column for parallel edges
+        keep_edges (bool): keep appended batches to be able to build the full network
+    """
+
+    def __init__(self, nodes: gpd.GeoDataFrame, column_aggs: dict, key: Optional[str] = None,
+                 origin: str = constants.ORIGIN, destination: str = constants.DESTINATION,
+                 node_id: str = constants.NODE_ID, keep_edges: bool = True):
+        if not isinstance(nodes, gpd.GeoDataFrame):
+            raise TypeError('Incompatible nodes data type: {e}'.format(e=type(nodes)))
+        if not nodes.index.name == node_id:
+            raise ValueError('Nodes dataframe must be indexed on {id}'.format(id=node_id))
+        unsupported = {func for func in column_aggs.values() if func not in PARTIALS}
+        if unsupported:
+            raise ValueError('Aggregations {aggs} can not be computed incrementally, supported ones: {supported}'
+                             .format(aggs=sorted(unsupported), supported=', '.join(PARTIALS)))
+
+        self._nodes = nodes
+        self._column_aggs = column_aggs
+        self._origin = origin
+        self._destination = destination
+        self._node_id = node_id
+        self._grouping = [origin, destination] + ([key] if key else [])
+        self._keep_edges = keep_edges
+        self._batches: List[pd.DataFrame] = []
+        # grouping key -> row of the partial aggregate arrays, arrays grow by doubling their capacity
+        self._positions: Dict[tuple, int] = {}
+        self._key_dtypes: Optional[list] = None
+        self._key_columns: Dict[str, np.ndarray] = {}
+        self._partials: Dict[str, np.ndarray] = {}
+        self._edge_count = 0
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def append(self, edges: pd.DataFrame) -> None:
+        """Validate a batch of edges and merge it into the running aggregates."""
+        for column in self._grouping:
+            if column not in edges:
+                raise KeyError('Column name: {column} is not found in the list: {columns}'
+                               .format(column=column, columns=list(edges.columns)))
+        SpatioTemporalNetwork._check_types(edges, self._origin, self._destination, self._nodes.index)
+        SpatioTemporalNetwork._validate_ids(edges[self._origin], self._nodes.index)
+        SpatioTemporalNetwork._validate_ids(edges[self._destination], self._nodes.index)
+
+        named_aggs = {self._partial_name(column, part): (column, part)
+                      for column, func in self._column_aggs.items() for part in PARTIALS[func]}
+        batch_partials = edges.groupby(self._grouping, observed=True).agg(**named_aggs)
+        self._merge_batch(batch_partials)
+
+        if self._keep_edges:
+            self._batches.append(edges)
+        self._edge_count += edges.shape[0]
+
+    def parallel_edges(self) -> pd.DataFrame:
+        """Aggregated parallel edges, same as agg_parallel_edges(column_aggs, key) of the full network."""
+        return self._finalize(self._current_partials()).reset_index()
+
+    def adjacent_edges(self, outgoing: bool = True, include_cycles: bool = True) -> pd.DataFrame:
+        """Per node aggregates, same as agg_adjacent_edges(column_aggs, outgoing, include_cycles) of the full network.
+
+        They are derived from the parallel edge aggregates, the cost depends on the number of node pairs only.
+        """
+        partials = self._current_partials().reset_index()
+        if not include_cycles:
+            partials = partials[partials[self._origin] != partials[self._destination]]
+        grouping_column = self._origin if outgoing else self._destination
+        merged = self._merge(partials.drop(columns=[c for c in self._grouping if c != grouping_column]),
+                             grouping_column)
+        return self._finalize(merged)
+
+    def aggregated_network(self) -> SpatioTemporalNetwork:
+        return SpatioTemporalNetwork(nodes=self._nodes, edges=self.parallel_edges(), origin=self._origin,
+                                     destination=self._destination, node_id=self._node_id,
+                                     validate=False)._with_ids_validated(True)
+
+    def network(self) -> SpatioTemporalNetwork:
+        """Network with all appended edges, every batch was validated on append."""
+        if not self._keep_edges:
+            raise ValueError('Edges are not kept, create the network with keep_edges=True')
+        if self._batches:
+            edges = pd.concat(self._batches, ignore_index=True)
+        else:
+            edges = pd.DataFrame({column: pd.Series(dtype=self._nodes.index.dtype if column in (
+                self._origin, self._destination) else object) for column in self._grouping})
+        return SpatioTemporalNetwork(nodes=self._nodes, edges=edges, origin=self._origin,
+                                     destination=self._destination, node_id=self._node_id,
+                                     validate=not self._batches)._with_ids_validated(True)
+
+    def _merge_batch(self, batch_partials: pd.DataFrame) -> None:
+        keys = batch_partials.index
+        if keys.empty:
+            return
+        if self._key_dtypes is None:
+            self._key_dtypes = list(keys.dtypes)
+        known = len(self._positions)
+        positions = np.fromiter((self._positions.setdefault(key, len(self._positions)) for key in keys),
+                                dtype=np.int64, count=len(keys))
+        # new keys get consecutive positions in the order they appear in the batch
+        added = positions >= known
+        for level, column in enumerate(self._grouping):
+            self._store(self._key_columns, column, positions, keys.get_level_values(level).to_numpy(), added)
+        for name in batch_partials.columns:
+            self._store(self._partials, name, positions, batch_partials[name].to_numpy(), added,
+                        MERGES[name.rsplit('__', 1)[1]])
+
+    def _store(self, arrays: Dict[str, np.ndarray], name: str, positions: np.ndarray, values: np.ndarray,
+               added: np.ndarray, merge: Optional[str] = None) -> None:
+        size = len(self._positions)
+        stored = arrays.get(name, np.empty(0, dtype=values.dtype))
+        if stored.dtype != values.dtype:
+            stored = stored.astype(np.result_type(stored.dtype, values.dtype))
+        if size > stored.shape[0]:
+            grown = np.empty(max(2 * stored.shape[0], size), dtype=stored.dtype)
+            grown[:stored.shape[0]] = stored
+            stored = grown
+        if merge is not None:
+            updated = positions[~added]
+            stored[updated] = self._combine(merge, stored[updated], values[~added])
+        stored[positions[added]] = values[added]
+        arrays[name] = stored
+
+    @staticmethod
+    def _combine(merge: str, stored: np.ndarray, values: np.ndarray) -> np.ndarray:
+        if merge == 'sum':
+            return stored + values
+        # pandas skips missing values the same way the groupby aggregation does
+        return getattr(pd.DataFrame({'stored': stored, 'values': values}), merge)(axis=1).to_numpy()
+
+    def _current_partials(self) -> pd.DataFrame:
+        size = len(self._positions)
+        if not size:
+            raise ValueError('No edges have been appended yet')
+        index = pd.MultiIndex.from_arrays(
+            [pd.Index(self._key_columns[column][:size]).astype(dtype)
+             for column, dtype in zip(self._grouping, self._key_dtypes)], names=self._grouping)
+        partials = pd.DataFrame({name: stored[:size] for name, stored in self._partials.items()}, index=index)
+        return partials.sort_index()
+
+    def _merge(self, partials: pd.DataFrame, grouping) -> pd.DataFrame:
+        merges = {name: MERGES[name.rsplit('__', 1)[1]] for name in partials.columns if '__' in name}
+        return partials.groupby(grouping).agg(merges)
+
+    def _finalize(self, partials: pd.DataFrame) -> pd.DataFrame:
+        result = pd.DataFrame(index=partials.index)
+        for column, func in self._column_aggs.items():
+            if func == 'mean':
+                result[column] = partials[self._partial_name(column, 'sum')] / partials[
+                    self._partial_name(column, 'count')]
+            else:
+                result[column] = partials[self._partial_name(column, func)]
+        return result
+
+    @staticmethod
+    def _partial_name(column: str, part: str) -> str:
+        return '{column}__{part}'.format(column=column, part=part)
@@ -1,14 +1,262 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+from typing import List, Optional
+
 import geopandas as gpd
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+
+from sttn import constants
+from sttn.network import SpatioTemporalNetwork, EDGE_BACKENDS
 
-from sttn.network import SpatioTemporalNetwork
+NETWORK_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+NODES_FILE = 'nodes.parquet'
+EDGES_DIR = 'edges'
+METADATA_KEY = b'sttn'
+NODES_IPC_FILE = '{path}-nodes.arrow'
+EDGES_IPC_FILE = '{path}-edges.arrow'
 
 
-def read_parquet(path: str) -> SpatioTemporalNetwork:
+def read_parquet(path: str, validate: Optional[bool] = None) -> SpatioTemporalNetwork:
     """Read STTN nodes and edges to the Parquet format.
+
+    Column names are restored from the edge file metadata. Edge ids are validated only if the file has no
+    checksum or it does not match the nodes, validate=True/False forces or skips the validation.
     """
+    import pyarrow.parquet as pq
+
     node_path = f"{path}-nodes.parquet"
     edge_path = f"{path}-edges.parquet"
     nodes = gpd.read_parquet(node_path)
-    edges = pd.read_parquet(edge_path)
-    return SpatioTemporalNetwork(nodes=nodes, edges=edges)
+    table = pq.read_table(edge_path)
+    metadata = network_metadata(table.schema)
+    names = {key: metadata[key] for key in ('origin', 'destination', 'node_id') if key in metadata}
+    return _restore_network(nodes, table.to_pandas(), metadata, names, validate)
+
+
+def network_checksum(node_index: pd.Index, origin: str, destination: str, node_id: str) -> str:
+    """Fingerprint of the node ids and column names the edges were validated against."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(node_index, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([str(node_index.dtype), origin, destination, node_id]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def with_network_metadata(table: pa.Table, network: SpatioTemporalNetwork) -> pa.Table:
+    """Add column names and, if the edge ids were validated, the validation checksum to the edge table metadata."""
+    metadata = {
+        'origin': network._origin,
+        'destination': network._destination,
+        'node_id': network._node_id,
+        'checksum': _validated_checksum(network),
+    }
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)})
+
+
+def network_metadata(schema: pa.Schema) -> dict:
+    stored = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(stored) if stored else {}
+
+
+def _validated_checksum(network: SpatioTemporalNetwork) -> Optional[str]:
+    # edges of a network built with validate=False may have ids missing from the nodes, readers must check them
+    if not network.ids_validated:
+        return None
+    return network_checksum(network.nodes.index, network._origin, network._destination, network._node_id)
+
+
+def _restore_network(nodes: gpd.GeoDataFrame, edges, metadata: dict, names: dict,
+                     validate: Optional[bool]) -> SpatioTemporalNetwork:
+    if validate is not None:
+        return SpatioTemporalNetwork(nodes=nodes, edges=edges, validate=validate, **names)
+    # a checksum is written only for validated edges, a match lets the id scan be skipped
+    validate = not _checksum_matches(metadata, nodes.index, **names)
+    return SpatioTemporalNetwork(nodes=nodes, edges=edges, validate=validate, **names)._with_ids_validated(True)
+
+
+def _checksum_matches(metadata: dict, node_index: pd.Index, origin: str = constants.ORIGIN,
+                      destination: str = constants.DESTINATION, node_id: str = constants.NODE_ID) -> bool:
+    return 'checksum' in metadata and metadata['checksum'] == network_checksum(node_index, origin, destination,
+                                                                               node_id)
+
+
+def write_network(network: SpatioTemporalNetwork, path: str, partition_by: Optional[List[str]] = None,
+                  time_column: Optional[str] = None, freq: Optional[str] = None) -> None:
+    """Write a STTN to a directory: nodes Parquet file, hive-partitioned edge dataset and a JSON manifest.
+
+    Args:
+        network (SpatioTemporalNetwork): network to write
+        path (str): output directory, previously written edges are replaced
+        partition_by (list): edge columns to partition on, e.g. the origin column
+        time_column (str): timestamp column used for time partitions, requires freq
+        freq (str): time partition frequency, e.g. 'D'; edges are partitioned on a derived timestamp column
+            `{time_column}_partition` holding the start of their time bucket, which is dropped on read.
+            Filters on the time column itself can not skip partitions, add a predicate on the partition
+            column to read_network filters for that
+    """
+    # ignore GeoPandas Parquet warnings
+    import warnings
+    warnings.filterwarnings('ignore', message='.*initial implementation of Parquet.*')
+
+    edges = network._edge_data() if not network.ids_encoded else network._plain_edges()
+    table = edges if isinstance(edges, pa.Table) else pa.Table.from_pandas(edges, preserve_index=False)
+    edge_columns = table.column_names
+    partition_by = list(partition_by or [])
+    for column in partition_by:
+        if column not in edge_columns:
+            raise KeyError('Column name: {column} is not found in the list: {columns}'
+                           .format(column=column, columns=edge_columns))
+
+    derived_columns = []
+    if freq is not None:
+        if time_column is None:
+            raise ValueError('Time partitions require a time_column')
+        partition_column = '{column}_partition'.format(column=time_column)
+        buckets = pd.Series(table.column(time_column).to_pandas()).dt.floor(freq)
+        table = table.append_column(partition_column,
+                                    pa.array(buckets, type=table.schema.field(time_column).type))
+        partition_by.append(partition_column)
+        derived_columns.append(partition_column)
+
+    os.makedirs(path, exist_ok=True)
+    network.nodes.to_parquet(os.path.join(path, NODES_FILE))
+    partitioning = None
+    if partition_by:
+        partitioning = ds.partitioning(pa.schema([table.schema.field(column) for column in partition_by]),
+                                       flavor='hive')
+    edges_path = os.path.join(path, EDGES_DIR)
+    # partitions which the new edges do not write to would otherwise be read together with them
+    if os.path.exists(edges_path):
+        shutil.rmtree(edges_path)
+    ds.write_dataset(table, edges_path, format='parquet', partitioning=partitioning)
+
+    manifest = {
+        'version': NETWORK_FORMAT_VERSION,
+        'origin': network._origin,
+        'destination': network._destination,
+        'node_id': network._node_id,
+        'node_id_dtype': str(network.nodes.index.dtype),
+        'edge_columns': edge_columns,
+        'partition_by': partition_by,
+        'derived_columns': derived_columns,
+        'checksum': _validated_checksum(network),
+        'edge_types': {field.name: str(field.type) for field in table.schema},
+        'edge_schema': base64.b64encode(table.schema.serialize().to_pybytes()).decode('ascii'),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+
+def read_network(path: str, columns: Optional[List[str]] = None, filter: Optional[ds.Expression] = None,
+                 backend: str = 'pandas', validate: Optional[bool] = None) -> SpatioTemporalNetwork:
+    """Read a STTN written by write_network.
+
+    Only the requested edge columns are read and the filter is pushed down into the scan, partitions and row
+    groups which can not match it are skipped. Origin and destination columns are always read.
+
+    Args:
+        path (str): network directory
+        columns (list): edge columns to read, all by default
+        filter (pyarrow.dataset.Expression): edge filter, e.g. ds.field('time') >= pd.Timestamp('2023-01-01');
+            for time partitioned edges ds.field('time_partition') >= pd.Timestamp('2023-01-01') skips the
+            partitions of earlier time buckets
+        backend (str): 'pandas' or 'arrow' edge backend of the returned network
+        validate (bool): force or skip the edge id validation, by default ids are validated only if the
+            manifest checksum does not match the nodes
+
+    Returns:
+        SpatioTemporalNetwork: network with the origin, destination and node_id names it was written with
+    """
+    if backend not in EDGE_BACKENDS:
+        raise ValueError('Unknown edge backend {backend}, expected one of {backends}'
+                         .format(backend=backend, backends=EDGE_BACKENDS))
+    with open(os.path.join(path, MANIFEST_FILE)) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest['version'] > NETWORK_FORMAT_VERSION:
+        raise ValueError('Unsupported network format version {version}'.format(version=manifest['version']))
+
+    nodes = gpd.read_parquet(os.path.join(path, NODES_FILE))
+    if str(nodes.index.dtype) != manifest['node_id_dtype']:
+        nodes.index = nodes.index.astype(manifest['node_id_dtype'])
+
+    edge_columns = manifest['edge_columns']
+    if columns is None:
+        columns = edge_columns
+    else:
+        for column in columns:
+            if column not in edge_columns:
+                raise KeyError('Column name: {column} is not found in the list: {columns}'
+                               .format(column=column, columns=edge_columns))
+        required = [manifest['origin'], manifest['destination']]
+        columns = [column for column in edge_columns if column in columns or column in required]
+
+    dataset = _open_edges(path, manifest)
+    table = dataset.to_table(columns=columns, filter=filter)
+    edges = table if backend == 'arrow' else table.to_pandas()
+    names = {key: manifest[key] for key in ('origin', 'destination', 'node_id')}
+    # a filtered or projected scan of validated edges stays valid
+    return _restore_network(nodes, edges, manifest, names, validate)
+
+
+def _open_edges(path: str, manifest: dict) -> ds.Dataset:
+    # partition values are encoded in directory names, the stored schema restores their types
+    schema = pa.ipc.read_schema(pa.py_buffer(base64.b64decode(manifest['edge_schema'])))
+    partitioning = None
+    if manifest['partition_by']:
+        partitioning = ds.partitioning(pa.schema([schema.field(column) for column in manifest['partition_by']]),
+                                       flavor='hive')
+    filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(os.path.join(path, EDGES_DIR), schema=schema, format='parquet', partitioning=partitioning,
+                      filesystem=filesystem)
+
+
+def write_arrow_ipc(network: SpatioTemporalNetwork, path: str) -> None:
+    """Write a STTN to uncompressed Arrow IPC files which open_arrow_ipc memory-maps.
+
+    Node geometries are stored as WKB, edges keep their arrow types, so reading them needs no deserialization.
+    """
+    edges = network._plain_edges() if network.ids_encoded else network._edge_data()
+    edge_table = edges if isinstance(edges, pa.Table) else pa.Table.from_pandas(edges, preserve_index=False)
+    _write_ipc(with_network_metadata(edge_table, network), EDGES_IPC_FILE.format(path=path))
+
+    nodes = network.nodes
+    geometry = nodes.geometry.name
+    node_frame = pd.DataFrame(nodes.drop(columns=geometry))
+    node_frame[geometry] = nodes.geometry.to_wkb()
+    node_table = pa.Table.from_pandas(node_frame)
+    geo_metadata = {'geometry': geometry, 'crs': nodes.crs.to_wkt() if nodes.crs is not None else None}
+    node_table = node_table.replace_schema_metadata(
+        {**node_table.schema.metadata, METADATA_KEY: json.dumps(geo_metadata)})
+    _write_ipc(node_table, NODES_IPC_FILE.format(path=path))
+
+
+def open_arrow_ipc(path: str, validate: Optional[bool] = None) -> SpatioTemporalNetwork:
+    """Open a STTN written by write_arrow_ipc with the arrow edge backend.
+
+    Edge columns are zero-copy views of the memory-mapped file, so processes opening the same network share one
+    page cache copy. Only node geometries are decoded from WKB.
+    """
+    edge_table = _read_ipc(EDGES_IPC_FILE.format(path=path))
+    node_table = _read_ipc(NODES_IPC_FILE.format(path=path))
+    geo_metadata = json.loads(node_table.schema.metadata[METADATA_KEY])
+    node_frame = node_table.to_pandas()
+    geometry = gpd.GeoSeries.from_wkb(node_frame.pop(geo_metadata['geometry']), crs=geo_metadata['crs'])
+    nodes = gpd.GeoDataFrame(node_frame, geometry=geometry.rename(geo_metadata['geometry']))
+
+    metadata = network_metadata(edge_table.schema)
+    names = {key: metadata[key] for key in ('origin', 'destination', 'node_id') if key in metadata}
+    return _restore_network(nodes, edge_table, metadata, names, validate)
+
+
+def _write_ipc(table: pa.Table, path: str) -> None:
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_ipc(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
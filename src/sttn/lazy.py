@@ -0,0 +1,143 @@
+import functools
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from sttn.network import SpatioTemporalNetwork
+
+Condition = Union[pd.Series, np.ndarray, Callable]
+
+
+class _Stage:
+    """Operations applied to one materialized network: node joins, fused filters and an optional aggregation."""
+
+    def __init__(self):
+        self.joins: List[pd.DataFrame] = []
+        self.node_conditions: List[Condition] = []
+        self.edge_conditions: List[Condition] = []
+        self.aggregation: Optional[dict] = None
+
+    def copy(self) -> '_Stage':
+        stage = _Stage()
+        stage.joins = list(self.joins)
+        stage.node_conditions = list(self.node_conditions)
+        stage.edge_conditions = list(self.edge_conditions)
+        stage.aggregation = self.aggregation
+        return stage
+
+    def describe(self) -> List[str]:
+        lines = ['JOIN node labels {columns}'.format(columns=list(extra.columns)) for extra in self.joins]
+        if self.node_conditions or self.edge_conditions:
+            line = 'FILTER {nodes} node and {edges} edge condition(s) fused into one edge mask'.format(
+                nodes=len(self.node_conditions), edges=len(self.edge_conditions))
+            if self.node_conditions:
+                line += ', node filter pushed down to edges'
+            lines.append(line)
+        if self.aggregation is not None:
+            lines.append('AGGREGATE parallel edges {column_aggs} key={key}'.format(**self.aggregation))
+        return lines
+
+
+class LazySpatioTemporalNetwork:
+    """Deferred chain of SpatioTemporalNetwork operations, nothing is computed until collect() is called.
+
+    Consecutive filters are fused into a single boolean mask and node filters are pushed down into the edge mask,
+    so every stage between aggregations copies the edge table at most once. Filter conditions are boolean
+    Series/arrays aligned with the nodes or edges of the network the stage starts from (the source network,
+    or the result of the previous aggregation), or callables which receive that nodes/edges frame.
+    Conditions have to be row-wise, they are evaluated on the frame before any filter of the stage is applied.
+    """
+
+    def __init__(self, network: SpatioTemporalNetwork, stages: Optional[List[_Stage]] = None):
+        self._network = network
+        self._stages = stages or [_Stage()]
+
+    def filter_nodes(self, condition: Condition) -> 'LazySpatioTemporalNetwork':
+        plan = self._extend()
+        plan._stages[-1].node_conditions.append(condition)
+        return plan
+
+    def filter_edges(self, condition: Condition) -> 'LazySpatioTemporalNetwork':
+        plan = self._extend()
+        plan._stages[-1].edge_conditions.append(condition)
+        return plan
+
+    def join_node_labels(self, extra_columns: pd.DataFrame) -> 'LazySpatioTemporalNetwork':
+        if not extra_columns.index.is_unique:
+            raise ValueError('Node labels index must be unique to join them lazily')
+        plan = self._extend()
+        plan._stages[-1].joins.append(extra_columns)
+        return plan
+
+    def agg_parallel_edges(self, column_aggs: dict, key: str = None) -> 'LazySpatioTemporalNetwork':
+        plan = self._extend()
+        plan._stages[-1].aggregation = {'column_aggs': column_aggs, 'key': key}
+        plan._stages.append(_Stage())
+        return plan
+
+    def _extend(self) -> 'LazySpatioTemporalNetwork':
+        # plans are immutable, so a partial plan can be reused as a base for several queries
+        return LazySpatioTemporalNetwork(self._network, [stage.copy() for stage in self._stages])
+
+    def explain(self) -> str:
+        """Human-readable description of the optimized plan."""
+        nodes, edges = self._network.shape()
+        lines = ['SCAN {nodes} nodes, {edges} edges'.format(nodes=nodes, edges=edges)]
+        for stage in self._stages:
+            lines.extend(stage.describe())
+        return '\n'.join(lines)
+
+    def collect(self) -> SpatioTemporalNetwork:
+        network = self._network
+        for stage in self._stages:
+            network = LazySpatioTemporalNetwork._run_stage(network, stage)
+        return network
+
+    @staticmethod
+    def _run_stage(network: SpatioTemporalNetwork, stage: _Stage) -> SpatioTemporalNetwork:
+        nodes = network.nodes
+        for extra_columns in stage.joins:
+            nodes = nodes.join(extra_columns)
+
+        if stage.node_conditions or stage.edge_conditions:
+            edge_mask = np.ones(network.shape()[1], dtype=bool)
+            # the arrow edge backend builds the pandas frame only if a callable condition needs it,
+            # the frame it would build has a range index
+            edge_index = (lambda: pd.RangeIndex(edge_mask.shape[0])) if network.edge_backend == 'arrow' else (
+                lambda: network._frame().index)
+            # decoded once for all callable conditions of the stage, the network itself stays encoded
+            edge_frame = functools.lru_cache(maxsize=None)(network._plain_edges)
+            for condition in stage.edge_conditions:
+                edge_mask &= LazySpatioTemporalNetwork._to_mask(condition, edge_mask.shape[0], edge_frame, edge_index)
+
+            if stage.node_conditions:
+                node_mask = np.ones(nodes.shape[0], dtype=bool)
+                for condition in stage.node_conditions:
+                    node_mask &= LazySpatioTemporalNetwork._to_mask(condition, node_mask.shape[0], lambda: nodes,
+                                                                    lambda: nodes.index)
+                # both edge ends have to be kept, node codes turn the check into two array takes
+                adjacency = network.adjacency
+                edge_mask &= node_mask[adjacency.origin_codes] & node_mask[adjacency.destination_codes]
+                nodes = nodes[node_mask]
+
+            network = network._with_edges(network._take_edges(edge_mask), nodes=nodes)
+        elif stage.joins:
+            network = network._with_edges(network._edge_data(), nodes=nodes)
+
+        if stage.aggregation is not None:
+            network = network.agg_parallel_edges(**stage.aggregation)
+        return network
+
+    @staticmethod
+    def _to_mask(condition: Condition, rows: int, get_frame: Callable[[], pd.DataFrame],
+                 get_index: Callable[[], pd.Index]) -> np.ndarray:
+        if callable(condition):
+            condition = condition(get_frame())
+        if len(condition) != rows:
+            msg = 'Number of rows {rows} is different from the length of the condition array {condition}'.format(
+                rows=rows, condition=len(condition))
+            raise ValueError(msg)
+        if isinstance(condition, pd.Series) and not condition.index.equals(get_index()):
+            raise ValueError('Condition index does not match the filtered frame index')
+        return np.asarray(condition, dtype=bool)
@@ -1,52 +1,116 @@
+from typing import Iterator, Optional, Tuple, Union
+
 import geopandas as gpd
 import networkx as nx
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from sttn import arrow
 from sttn import constants
+from sttn import spatial
+from sttn.adjacency import AdjacencyIndex
+from sttn.temporal import NetworkSnapshots, TimeIndex
+
+EDGE_BACKENDS = ('pandas', 'arrow')
 
 
 class SpatioTemporalNetwork:
-    def __init__(self, nodes: gpd.GeoDataFrame, edges: pd.DataFrame, origin: str = constants.ORIGIN,
-                 destination: str = constants.DESTINATION, node_id: str = constants.NODE_ID):
+    def __init__(self, nodes: gpd.GeoDataFrame, edges: Union[pd.DataFrame, pa.Table], origin: str = constants.ORIGIN,
+                 destination: str = constants.DESTINATION, node_id: str = constants.NODE_ID, validate: bool = True):
+        """Spatio-temporal transactional network.
+
+        Edges are either a pandas DataFrame or a pyarrow Table. With a Table (the arrow edge backend) filters and
+        aggregations run as multi-threaded arrow kernels. Accessing `edges` builds the pandas frame, which then
+        replaces the Table as the stored edges and the network continues on the pandas backend.
+
+        Pandas origin and destination columns can be categoricals whose categories are the node index
+        (see encode_ids), then edge ids are stored as small integer codes. Accessing `edges` decodes them once
+        and the decoded frame becomes the stored edges, so the network data stays a single frame.
+
+        validate=False skips the scan checking that every origin and destination id is in the node index,
+        it is meant for networks derived from an already validated one. Column and dtype checks always run.
+        Whether the ids were validated is tracked, networks derived by operations inherit it, and only
+        validated networks are written with a checksum which lets readers skip the id scan.
+        """
         if not isinstance(nodes, gpd.GeoDataFrame):
             raise TypeError('Incompatible nodes data type: {e}'.format(e=type(edges)))
 
-        if not isinstance(edges, pd.DataFrame):
+        if not isinstance(edges, (pd.DataFrame, pa.Table)):
             raise TypeError('Incompatible edges data type: {e}'.format(e=type(edges)))
 
-        if origin not in edges:
+        columns = edges.column_names if isinstance(edges, pa.Table) else list(edges.columns)
+        if origin not in columns:
             raise KeyError('Origin column name: {orig} is not found in the list: {columns}'
-                           .format(orig=origin, columns=list(edges.columns)))
+                           .format(orig=origin, columns=columns))
 
-        if destination not in edges:
+        if destination not in columns:
             raise KeyError('Destination column name: {dest} is not found in the list: {columns}'
-                           .format(dest=destination, columns=list(edges.columns)))
+                           .format(dest=destination, columns=columns))
 
         if not nodes.index.name == node_id:
             raise ValueError('Nodes dataframe must be indexed on {id}'.format(id=node_id))
 
+        if isinstance(edges, pa.Table):
+            SpatioTemporalNetwork._check_arrow_types(edges, origin, destination, nodes.index)
+        else:
+            SpatioTemporalNetwork._check_types(edges, origin, destination, nodes.index)
+
+        if validate:
+            SpatioTemporalNetwork._validate_ids(edges[origin], nodes.index)
+            SpatioTemporalNetwork._validate_ids(edges[destination], nodes.index)
+
+        self._nodes = nodes
+        self._edges = edges if isinstance(edges, pd.DataFrame) else None
+        self._edge_table = edges if isinstance(edges, pa.Table) else None
+        self._ids_encoded = self._edges is not None and isinstance(self._edges[origin].dtype, pd.CategoricalDtype)
+        self._ids_validated = validate
+        self._origin = origin
+        self._destination = destination
+        self._node_id = node_id
+        self._adjacency = None
+        self._time_indexes = {}
+        self._spatial = {}
+
+    @staticmethod
+    def _check_types(edges: pd.DataFrame, origin: str, destination: str, node_index: pd.Index):
         if edges[origin].dtype != edges[destination].dtype:
             raise TypeError('Origin dtype {o} does not match destination dtype {d}'
                             .format(o=edges[origin].dtype, d=edges[destination].dtype))
 
-        if edges[origin].dtype != nodes.index.dtype:
+        id_dtype = edges[origin].dtype
+        if isinstance(id_dtype, pd.CategoricalDtype):
+            if not id_dtype.categories.equals(node_index):
+                raise ValueError('Encoded origin and destination categories must be equal to the node index')
+            id_dtype = id_dtype.categories.dtype
+
+        if id_dtype != node_index.dtype:
             raise TypeError('Origin dtype {o} does not match node index dtype {d}'
-                            .format(o=edges[origin].dtype, d=nodes.index.dtype))
+                            .format(o=id_dtype, d=node_index.dtype))
 
-        SpatioTemporalNetwork._validate_ids(edges[origin], nodes.index)
-        SpatioTemporalNetwork._validate_ids(edges[destination], nodes.index)
+    @staticmethod
+    def _check_arrow_types(edges: pa.Table, origin: str, destination: str, node_index: pd.Index):
+        origin_type = edges.schema.field(origin).type
+        destination_type = edges.schema.field(destination).type
+        if origin_type != destination_type:
+            raise TypeError('Origin dtype {o} does not match destination dtype {d}'
+                            .format(o=origin_type, d=destination_type))
 
-        self._nodes = nodes
-        self._edges = edges
-        self._origin = origin
-        self._destination = destination
-        self._node_id = node_id
+        if not arrow.types_match(origin_type, arrow.index_type(node_index)):
+            raise TypeError('Origin dtype {o} does not match node index dtype {d}'
+                            .format(o=origin_type, d=node_index.dtype))
 
     @staticmethod
-    def _validate_ids(edge_ids: pd.Series, node_index: pd.Index):
-        not_in_index = edge_ids[~edge_ids.isin(node_index)]
-        if not_in_index.size > 0:
-            samples = not_in_index.unique()[:5]
+    def _validate_ids(edge_ids: Union[pd.Series, pa.ChunkedArray], node_index: pd.Index):
+        if isinstance(edge_ids, pa.ChunkedArray):
+            samples = arrow.missing_ids(edge_ids, node_index)
+        elif isinstance(edge_ids.dtype, pd.CategoricalDtype):
+            # categories are the node index, only missing values have no code
+            samples = edge_ids[edge_ids.cat.codes < 0].unique()[:5]
+        else:
+            samples = edge_ids[~edge_ids.isin(node_index)].unique()[:5]
+        if len(samples) > 0:
             raise KeyError('Edge ids {ids} are not in the node index'.format(ids=samples))
 
     @property
@@ -55,29 +119,386 @@ class SpatioTemporalNetwork:
 
     @property
     def edges(self) -> pd.DataFrame:
+        """Edge data of the network, changes made to the frame (e.g. added columns) are seen by later operations."""
+        if self._ids_encoded:
+            # the decoded frame replaces the encoded one instead of being a second copy of the edges
+            self._edges = self._plain_edges()
+            self._ids_encoded = False
+        if self._edge_table is not None:
+            # arrow kernels would not see changes made to the frame, so it becomes the stored edges
+            self._frame()
+            self._edge_table = None
+        return self._edges
+
+    @property
+    def ids_encoded(self) -> bool:
+        return self._ids_encoded
+
+    def encode_ids(self) -> 'SpatioTemporalNetwork':
+        """Return the same network where origin and destination are stored as categoricals sharing the node index.
+
+        Edge ids become small integer codes (positions in the node index), which saves memory and turns
+        id joins into array takes. Operations keep the encoding, accessing the `edges` property decodes the ids
+        and stores the decoded frame in place of the encoded one.
+        """
+        if self._ids_encoded:
+            return self
+        if self._edge_table is not None:
+            raise ValueError('Node id encoding is supported only by the pandas edge backend')
+
+        adjacency = self.adjacency
+        id_dtype = pd.CategoricalDtype(self._nodes.index)
+        edges = self._edges.assign(**{
+            self._origin: pd.Categorical.from_codes(adjacency.origin_codes, dtype=id_dtype),
+            self._destination: pd.Categorical.from_codes(adjacency.destination_codes, dtype=id_dtype)})
+        encoded = self._with_edges(edges)
+        encoded._adjacency = adjacency
+        return encoded
+
+    def decode_ids(self) -> 'SpatioTemporalNetwork':
+        """Return the same network with origin and destination stored as plain node ids."""
+        return self._with_edges(self._plain_edges()) if self._ids_encoded else self
+
+    @property
+    def edge_backend(self) -> str:
+        return 'pandas' if self._edge_table is None else 'arrow'
+
+    def to_edge_backend(self, backend: str) -> 'SpatioTemporalNetwork':
+        """Return the same network with edges stored as a pandas DataFrame ('pandas') or a pyarrow Table ('arrow')."""
+        if backend not in EDGE_BACKENDS:
+            raise ValueError('Unsupported edge backend {b}, expected one of: {backends}'
+                             .format(b=backend, backends=', '.join(EDGE_BACKENDS)))
+        if backend == self.edge_backend:
+            return self
+        edges = self._plain_edges()
+        if backend == 'arrow':
+            edges = pa.Table.from_pandas(edges, preserve_index=False)
+        return self._with_edges(edges)
+
+    def _with_edges(self, edges: Union[pd.DataFrame, pa.Table], nodes: Optional[gpd.GeoDataFrame] = None):
+        """Network with the same schema built from edges (and nodes) known to be valid."""
+        nodes = self._nodes if nodes is None else nodes
+        if self._ids_encoded and isinstance(edges, pd.DataFrame) and not nodes.index.equals(self._nodes.index):
+            edges = self._recode_ids(edges, nodes.index)
+        network = SpatioTemporalNetwork(nodes=nodes, edges=edges, origin=self._origin,
+                                        destination=self._destination, node_id=self._node_id, validate=False)
+        if nodes is self._nodes:
+            # centroids and spatial indexes depend on the nodes only
+            network._spatial = self._spatial
+        return network._with_ids_validated(self._ids_validated)
+
+    def _with_ids_validated(self, ids_validated: bool) -> 'SpatioTemporalNetwork':
+        """Record whether the edge ids were checked against the node index, by this network or its source."""
+        self._ids_validated = ids_validated
+        return self
+
+    @property
+    def ids_validated(self) -> bool:
+        return self._ids_validated
+
+    def _recode_ids(self, edges: pd.DataFrame, node_index: pd.Index) -> pd.DataFrame:
+        # old code -> new code, edge ids stay integer codes the whole time
+        code_map = node_index.get_indexer(self._nodes.index)
+        id_dtype = pd.CategoricalDtype(node_index)
+        return edges.assign(**{
+            column: pd.Categorical.from_codes(code_map[edges[column].cat.codes.to_numpy()], dtype=id_dtype)
+            for column in (self._origin, self._destination)})
+
+    def _frame(self) -> pd.DataFrame:
+        """Edges as stored in pandas, ids stay encoded for encoded networks."""
+        if self._edges is None:
+            self._edges = self._edge_table.to_pandas()
         return self._edges
 
+    def _plain_edges(self) -> pd.DataFrame:
+        """Edges as pandas with node ids, for read-only use without changing how the network stores them."""
+        if not self._ids_encoded:
+            return self._frame()
+        id_dtype = self._nodes.index.dtype
+        return self._edges.astype({self._origin: id_dtype, self._destination: id_dtype})
+
+    def _edge_data(self) -> Union[pd.DataFrame, pa.Table]:
+        return self._edges if self._edge_table is None else self._edge_table
+
+    def _edge_values(self, column: str) -> np.ndarray:
+        if self._edge_table is None:
+            return self._edges[column].to_numpy()
+        return self._edge_table.column(column).to_numpy()
+
+    def _edge_weights(self, column: str) -> np.ndarray:
+        weights = np.array(self._edge_values(column), dtype=np.float64)
+        weights[np.isnan(weights)] = 0
+        return weights
+
+    def _edge_series(self, column: str) -> pd.Series:
+        if self._edge_table is None:
+            return self._edges[column]
+        return self._edge_table.column(column).to_pandas()
+
+    def _take_rows(self, positions: Union[slice, np.ndarray]) -> 'SpatioTemporalNetwork':
+        """Network with edges at the given row positions, the cached node codes are sliced along."""
+        if self._edge_table is None:
+            edges = self._edges.iloc[positions]
+        elif isinstance(positions, slice):
+            edges = self._edge_table.slice(positions.start, positions.stop - positions.start)
+        else:
+            edges = self._edge_table.take(positions)
+        network = self._with_edges(edges)
+        if self._adjacency is not None:
+            network._adjacency = AdjacencyIndex(self._nodes.index, self._adjacency.origin_codes[positions],
+                                                self._adjacency.destination_codes[positions])
+        return network
+
+    def _take_edges(self, mask: np.ndarray) -> Union[pd.DataFrame, pa.Table]:
+        if self._edge_table is None:
+            return self._edges[mask]
+        return self._edge_table.filter(arrow.to_mask(mask))
+
+    @property
+    def adjacency(self) -> AdjacencyIndex:
+        """Integer-coded CSR/CSC edge index, built on first access and cached for the network lifetime."""
+        if self._adjacency is None and self._ids_encoded:
+            self._adjacency = AdjacencyIndex(self._nodes.index,
+                                             self._edges[self._origin].cat.codes.to_numpy().astype(np.int32),
+                                             self._edges[self._destination].cat.codes.to_numpy().astype(np.int32))
+        if self._adjacency is None:
+            self._adjacency = AdjacencyIndex.from_edges(self._nodes.index, self._edge_values(self._origin),
+                                                        self._edge_values(self._destination))
+        return self._adjacency
+
+    def centroid_crs(self):
+        """CRS the node centroids are computed in, the estimated UTM zone for nodes in a geographic CRS."""
+        if 'crs' not in self._spatial:
+            crs = self._nodes.crs
+            if crs is not None and crs.is_geographic:
+                crs = self._nodes.estimate_utm_crs()
+            self._spatial['crs'] = crs
+        return self._spatial['crs']
+
+    def node_centroids(self, projected: bool = False) -> np.ndarray:
+        """Node centroid (x, y) coordinates in node index order, computed once and cached.
+
+        Centroids are computed in centroid_crs, projected=True returns them in that CRS, otherwise in the node CRS.
+        Rows line up with adjacency codes, so edge coordinates are a take with the origin/destination codes.
+        """
+        key = 'projected' if projected else 'nodes'
+        if key not in self._spatial:
+            crs = self.centroid_crs()
+            geometry = self._nodes.geometry if crs is None else self._nodes.geometry.to_crs(crs)
+            centroids = geometry.centroid
+            if not projected and crs is not None:
+                centroids = centroids.to_crs(self._nodes.crs)
+            self._spatial[key] = np.column_stack([centroids.x.to_numpy(), centroids.y.to_numpy()])
+        return self._spatial[key]
+
+    def _node_tree(self):
+        if 'tree' not in self._spatial:
+            self._spatial['tree'] = spatial.node_tree(self._nodes.geometry.values)
+        return self._spatial['tree']
+
+    def _point_locator(self) -> spatial.PointLocator:
+        if 'locator' not in self._spatial:
+            self._spatial['locator'] = spatial.PointLocator(self._node_tree())
+        return self._spatial['locator']
+
+    def _centroid_tree(self):
+        """KD-tree over projected node centroids, tree positions are node codes."""
+        if 'kdtree' not in self._spatial:
+            from scipy.spatial import cKDTree
+            self._spatial['kdtree'] = cKDTree(self.node_centroids(projected=True))
+        return self._spatial['kdtree']
+
+    def _km_to_crs_units(self) -> float:
+        crs = self.centroid_crs()
+        return 1000.0 if crs is None else 1000.0 / crs.axis_info[0].unit_conversion_factor
+
+    def nodes_within(self, node_id, km: float) -> pd.Series:
+        """Nodes with a centroid within the distance from the node centroid.
+
+        Args:
+            node_id: id of the center node
+            km (float): radius in kilometers
+
+        Returns:
+            pd.Series: centroid distances in km indexed by node id, nearest first, the node itself excluded
+        """
+        code = self._nodes.index.get_loc(node_id)
+        units = self._km_to_crs_units()
+        centroids = self.node_centroids(projected=True)
+        codes = np.asarray(self._centroid_tree().query_ball_point(centroids[code], km * units), dtype=np.int64)
+        codes = codes[codes != code]
+        distances = np.hypot(*(centroids[codes] - centroids[code]).T) / units
+        return self._node_distances(codes, distances)
+
+    def knn(self, node_id, k: int) -> pd.Series:
+        """The k nodes with the nearest centroids to the node centroid.
+
+        Returns:
+            pd.Series: centroid distances in km indexed by node id, nearest first, the node itself excluded
+        """
+        code = self._nodes.index.get_loc(node_id)
+        k = min(k, len(self._nodes) - 1)
+        if k <= 0:
+            return self._node_distances(np.array([], dtype=np.int64), np.array([]))
+        # the node itself is one of the nearest, it is dropped below
+        distances, codes = self._centroid_tree().query(self.node_centroids(projected=True)[code], k=k + 1)
+        keep = codes != code
+        codes, distances = codes[keep][:k], distances[keep][:k]
+        return self._node_distances(codes, distances / self._km_to_crs_units())
+
+    def _node_distances(self, codes: np.ndarray, distances: np.ndarray) -> pd.Series:
+        order = np.argsort(distances, kind='stable')
+        return pd.Series(distances[order], index=self._nodes.index[codes[order]], name='distance')
+
+    def adjacency_touching(self) -> 'SpatioTemporalNetwork':
+        """Contiguity graph of the nodes, an edge in both directions between every two touching geometries.
+
+        The graph is computed with a STRtree query over the node geometries once and cached.
+        """
+        if 'touching' not in self._spatial:
+            origin_codes, destination_codes = spatial.touching_pairs(self._node_tree())
+            edges = pd.DataFrame({self._origin: self._nodes.index[origin_codes],
+                                  self._destination: self._nodes.index[destination_codes]})
+            # edges are taken from the node index, so their ids are valid
+            self._spatial['touching'] = SpatioTemporalNetwork(nodes=self._nodes, edges=edges, origin=self._origin,
+                                                              destination=self._destination,
+                                                              node_id=self._node_id,
+                                                              validate=False)._with_ids_validated(True)
+            self._spatial['touching']._spatial = self._spatial
+        return self._spatial['touching']
+
+    def locate(self, points_lat, points_lng) -> pd.Series:
+        """Ids of the nodes containing WGS84 points, missing for points outside of every node.
+
+        Points are matched in bulk against a cached grid index built with a STRtree over node geometries.
+        A point on a shared border is assigned to the node which comes first in the node index.
+
+        Args:
+            points_lat: point latitudes
+            points_lng: point longitudes
+
+        Returns:
+            pd.Series: node id of every point, in the order of the input points
+        """
+        lat = np.asarray(points_lat, dtype=np.float64)
+        lng = np.asarray(points_lng, dtype=np.float64)
+        if lat.shape != lng.shape:
+            raise ValueError('Latitude and longitude arrays must have the same length')
+        crs = self._nodes.crs
+        if crs is not None and not crs.equals('EPSG:4326'):
+            from pyproj import Transformer
+            lng, lat = Transformer.from_crs('EPSG:4326', crs, always_xy=True).transform(lng, lat)
+
+        codes = self._point_locator().locate(lng, lat)
+        located = codes >= 0
+        ids = pd.Series(self._nodes.index.take(np.where(located, codes, 0)), name=self._node_id)
+        return ids if located.all() else ids.where(located)
+
+    def time_index(self, column: str) -> TimeIndex:
+        """Sorted index over an edge time column, built on first use and cached, used by between and resample."""
+        if column not in self._time_indexes:
+            self._time_indexes[column] = TimeIndex(pd.Index(self._edge_series(column)))
+        return self._time_indexes[column]
+
+    def between(self, start=None, end=None, column: Optional[str] = None) -> 'SpatioTemporalNetwork':
+        """Keep edges with start <= column value < end, a missing bound leaves the window open.
+
+        The window is found with a binary search over the time index, the column can be omitted
+        if time_index was built for exactly one column.
+        """
+        index = self.time_index(self._time_column(column))
+        return self._take_rows(index.window(start, end))
+
+    def resample(self, freq: str, column: Optional[str] = None) -> Iterator[Tuple[pd.Timestamp, 'SpatioTemporalNetwork']]:
+        """Split the network into consecutive time windows of a frequency, e.g. '1h', '1D', 'W' or 'MS'.
+
+        Yields (window start, network) pairs, windows are aligned to the frequency and empty windows are included.
+        """
+        return self.snapshots(column, freq=freq).items()
+
+    def snapshots(self, time_column: Optional[str] = None, freq: str = '1h',
+                  window: Optional[str] = None) -> NetworkSnapshots:
+        """Lazy sequence of per-window networks built from one sort of the time column.
+
+        Args:
+            time_column (str): edge time column, can be omitted if time_index was built for exactly one column
+            freq (str): frequency of window starts, e.g. '1h', '1D', 'W' or 'MS'
+            window (str): window length for rolling windows, equal to freq if not set
+
+        Returns:
+            NetworkSnapshots: sequence of networks sharing this network nodes, `starts` holds window starts
+        """
+        index = self.time_index(self._time_column(time_column))
+        return NetworkSnapshots(self, index, freq=freq, window=window)
+
+    def _time_column(self, column: Optional[str]) -> str:
+        if column is not None:
+            return column
+        if len(self._time_indexes) != 1:
+            raise ValueError('Time column is ambiguous, pass the column or build exactly one time_index')
+        return next(iter(self._time_indexes))
+
     def agg_parallel_edges(self, column_aggs: dict, key: str = None):
         grouping = [self._origin, self._destination]
         if key:
             grouping.append(key)
-        new_edges = self._edges.groupby(by=grouping, as_index=False).agg(column_aggs)
-        return SpatioTemporalNetwork(nodes=self._nodes, edges=new_edges, origin=self._origin,
-                                     destination=self._destination, node_id=self._node_id)
+        if self._edge_table is not None:
+            grouped = arrow.group_by(self._edge_table, grouping, column_aggs)
+            if grouped is not None:
+                return self._with_edges(grouped)
+        new_edges = self._frame().groupby(by=grouping, as_index=False, observed=True).agg(column_aggs)
+        return self._with_edges(new_edges)
+
+    def lazy(self):
+        """Start a lazy chain of filters, joins and aggregations which is executed by collect()."""
+        from sttn.lazy import LazySpatioTemporalNetwork
+        return LazySpatioTemporalNetwork(self)
 
     def to_multigraph(self):
-        return nx.from_pandas_edgelist(self._edges, source=self._origin, target=self._destination,
+        return nx.from_pandas_edgelist(self._plain_edges(), source=self._origin, target=self._destination,
                                        edge_attr=True, create_using=nx.MultiDiGraph)
 
+    def to_sparse_matrix(self, weight: Optional[str] = None):
+        """Node by node scipy CSR matrix where parallel edges are summed up.
+
+        Rows and columns follow the order of the node index, edges count as 1 if weight is not set.
+        """
+        from scipy import sparse
+        adjacency = self.adjacency
+        size = len(self._nodes)
+        if weight is None:
+            values = np.ones(len(adjacency.origin_codes), dtype=np.float64)
+        else:
+            values = self._edge_weights(weight)
+        return sparse.csr_matrix((values, (adjacency.origin_codes, adjacency.destination_codes)), shape=(size, size))
+
     def to_flow_date_frame(self, flow: str):
         import skmob
-        return skmob.FlowDataFrame(self._edges, origin=self._origin, destination=self._destination, flow=flow,
+        return skmob.FlowDataFrame(self._plain_edges(), origin=self._origin, destination=self._destination, flow=flow,
                                    tile_id=self._node_id, tessellation=self._nodes.reset_index())
 
     def shape(self) -> (int, int):
-        return self._nodes.shape[0], self._edges.shape[0]
+        edge_count = self._edges.shape[0] if self._edge_table is None else self._edge_table.num_rows
+        return self._nodes.shape[0], edge_count
+
+    def group_nodes(self, node_label, geometry: str = 'union', n_jobs: Optional[int] = None,
+                    column_aggs: Optional[dict] = None, key: Optional[str] = None):
+        """Merge nodes with the same label into one node and relabel the edges with the merged node ids.
+
+        Node columns take the first value of the group, as in GeoDataFrame.dissolve. Edges are relabeled with
+        integer code takes, column_aggs aggregates parallel edges of the merged nodes in the same pass.
 
-    def group_nodes(self, node_label):
+        Args:
+            node_label: node column with group labels, or a list of node id lists (e.g. communities)
+            geometry (str): merged node geometry, 'union' of the group geometries, 'convex_hull' of the group
+                geometries, much cheaper than the union, or 'none' to skip the geometry
+            n_jobs (int): processes computing the geometry unions, a single process by default
+            column_aggs (dict): parallel edge aggregations, same as group_nodes(...).agg_parallel_edges
+            key (str): extra grouping column of the parallel edge aggregation
+
+        Returns:
+            SpatioTemporalNetwork: network of the merged nodes
+        """
         nodes = self._nodes
 
         if isinstance(node_label, list):
@@ -87,30 +508,125 @@ class SpatioTemporalNetwork:
             nodes = self._nodes.join(community_df)
             node_label = 'community'
 
-        dissolved = nodes.dissolve(by=node_label, as_index=False).rename(columns={node_label: self._node_id})
-        dissolved = dissolved.set_index(self._node_id)
+        geometry_column = nodes.geometry.name
+        attributes = pd.DataFrame(nodes.drop(columns=[geometry_column])).groupby(node_label).first()
+        attributes.index.name = self._node_id
+        group_codes = attributes.index.get_indexer(nodes[node_label])
+        group_geometry = spatial.group_geometries(nodes.geometry.values, group_codes, len(attributes), geometry,
+                                                  n_jobs)
+        grouped_nodes = gpd.GeoDataFrame(attributes, geometry=gpd.GeoSeries(
+            group_geometry, index=attributes.index, crs=nodes.crs).rename(geometry_column))
+        grouped_nodes = grouped_nodes[[geometry_column] + list(attributes.columns)]
+
+        # relabel edges with array takes: node code -> group code -> group id
+        adjacency = self.adjacency
+        origin_codes = group_codes[adjacency.origin_codes]
+        destination_codes = group_codes[adjacency.destination_codes]
+        if (origin_codes < 0).any() or (destination_codes < 0).any():
+            unlabeled = nodes.index[group_codes < 0][:5]
+            raise KeyError('Edge ids {ids} are not in the node index'.format(ids=list(unlabeled)))
+
+        if column_aggs is not None:
+            edges = self._agg_grouped_edges(origin_codes, destination_codes, column_aggs, key)
+            origin_codes, destination_codes = edges.pop(self._origin), edges.pop(self._destination)
+        else:
+            edges = self._frame()
+        id_index = grouped_nodes.index
+        if self._ids_encoded:
+            id_dtype = pd.CategoricalDtype(id_index)
+            origin_ids = pd.Categorical.from_codes(origin_codes, dtype=id_dtype)
+            destination_ids = pd.Categorical.from_codes(destination_codes, dtype=id_dtype)
+        else:
+            origin_ids = id_index.take(origin_codes)
+            destination_ids = id_index.take(destination_codes)
+        relabeled = {self._origin: pd.Series(origin_ids, index=edges.index),
+                     self._destination: pd.Series(destination_ids, index=edges.index)}
+        if column_aggs is not None:
+            mapped = pd.concat([pd.DataFrame(relabeled), edges], axis=1)
+        else:
+            mapped = edges.assign(**relabeled)
+        return SpatioTemporalNetwork(nodes=grouped_nodes, edges=mapped, origin=self._origin,
+                                     destination=self._destination, node_id=self._node_id,
+                                     validate=False)._with_ids_validated(self._ids_validated)
 
-        node_mapping = nodes[[node_label]]
-        mapped_from = self._edges.join(node_mapping, on=self._origin) \
-            .drop(self._origin, axis=1) \
-            .rename(columns={node_label: self._origin})
-        mapped_to = mapped_from.join(node_mapping, on=self._destination) \
-            .drop(self._destination, axis=1) \
-            .rename(columns={node_label: self._destination})
-        return SpatioTemporalNetwork(nodes=dissolved, edges=mapped_to, origin=self._origin,
-                                     destination=self._destination, node_id=self._node_id)
+    def _agg_grouped_edges(self, origin_codes: np.ndarray, destination_codes: np.ndarray, column_aggs: dict,
+                           key: Optional[str] = None) -> pd.DataFrame:
+        """Parallel edge aggregates keyed by group codes, code columns are named as origin and destination."""
+        values = [key] + list(column_aggs) if key else list(column_aggs)
+        grouping = [self._origin, self._destination] + ([key] if key else [])
+        if self._edge_table is not None:
+            table = pa.table({self._origin: origin_codes, self._destination: destination_codes,
+                              **{column: self._edge_table.column(column) for column in values}})
+            grouped = arrow.group_by(table, grouping, column_aggs)
+            if grouped is not None:
+                return grouped.to_pandas()
+        frame = self._frame()
+        codes = pd.DataFrame({self._origin: origin_codes, self._destination: destination_codes}, index=frame.index)
+        table = pd.concat([codes, frame[values]], axis=1)
+        return table.groupby(by=grouping, as_index=False, observed=True).agg(column_aggs)
 
     def agg_adjacent_edges(self, aggs: dict, outgoing: bool = True, include_cycles: bool = True) -> pd.DataFrame:
         grouping_column = self._origin if outgoing else self._destination
-        edges = self._edges if include_cycles else self._edges[
-            self._edges[self._origin] != self._edges[self._destination]]
-        grouped = edges.groupby(grouping_column).agg(aggs)
-        return grouped.rename(columns={grouping_column: self._node_id})
+        if self._edge_table is not None:
+            table = self._edge_table
+            if not include_cycles:
+                table = table.filter(pc.not_equal(table[self._origin], table[self._destination]))
+            table_aggs = aggs
+            if grouping_column in aggs and self._node_id not in table.column_names:
+                # the aggregate of the grouping column is named after the node id, as in the pandas result
+                table = table.append_column(self._node_id, table[grouping_column])
+                table_aggs = {self._node_id if column == grouping_column else column: func
+                              for column, func in aggs.items()}
+            grouped = arrow.group_by(table, [grouping_column], table_aggs)
+            if grouped is not None:
+                return grouped.to_pandas().set_index(grouping_column)
+
+        adjacency = self.adjacency
+        codes = adjacency.origin_codes if outgoing else adjacency.destination_codes
+        edges = self._frame()
+        if not include_cycles:
+            non_cycles = adjacency.origin_codes != adjacency.destination_codes
+            edges = edges[non_cycles]
+            codes = codes[non_cycles]
+        # group by dense node codes and decode the (much smaller) result back to node ids
+        grouped = edges.groupby(codes, sort=False).agg(aggs)
+        grouped.index = self._nodes.index[grouped.index].rename(grouping_column)
+        return grouped.sort_index().rename(columns={grouping_column: self._node_id})
+
+    def degree(self, direction: str = 'both', weight: Optional[str] = None,
+               unique_neighbors: bool = False) -> pd.Series:
+        """Node degree (or strength if weight is set) indexed and ordered as the network nodes.
+
+        Args:
+            direction (str): 'out' counts outgoing edges, 'in' incoming edges, 'both' sums the two
+            weight (str): edge column to sum up instead of counting edges
+            unique_neighbors (bool): count parallel edges once, same as a degree in the collapsed directed graph
+
+        Returns:
+            pd.Series: degree of every node, isolated nodes have zero degree
+        """
+        if direction not in ('in', 'out', 'both'):
+            raise ValueError('Unsupported degree direction {d}, expected one of: in, out, both'.format(d=direction))
+        if unique_neighbors and weight is not None:
+            raise ValueError('Weighted degree can not be combined with unique_neighbors')
+
+        adjacency = self.adjacency
+        size = len(self._nodes)
+        origin_codes, destination_codes = adjacency.origin_codes, adjacency.destination_codes
+        if unique_neighbors:
+            origin_codes, destination_codes = adjacency.unique_pairs()
+        weights = None if weight is None else self._edge_weights(weight)
+
+        degree = np.zeros(size, dtype=np.int64 if weights is None else np.float64)
+        if direction in ('out', 'both'):
+            degree += np.bincount(origin_codes, weights=weights, minlength=size).astype(degree.dtype, copy=False)
+        if direction in ('in', 'both'):
+            degree += np.bincount(destination_codes, weights=weights, minlength=size).astype(degree.dtype, copy=False)
+        return pd.Series(degree, index=self._nodes.index, name='degree')
 
     def join_node_labels(self, extra_columns):
         new_nodes = self._nodes.join(extra_columns)
-        return SpatioTemporalNetwork(nodes=new_nodes, edges=self._edges, origin=self._origin,
-                                     destination=self._destination, node_id=self._node_id)
+        return self._with_edges(self._edge_data(), nodes=new_nodes)
 
     def filter_nodes(self, condition: pd.Series):
         if self._nodes.shape[0] != condition.shape[0]:
@@ -119,20 +635,53 @@ class SpatioTemporalNetwork:
             raise ValueError(msg)
 
         ids_to_keep = self._nodes[condition].index
-        filtered_edges = self._edges[
-            self._edges[self._origin].isin(ids_to_keep) & self._edges[self._destination].isin(ids_to_keep)]
-        return SpatioTemporalNetwork(nodes=self._nodes[condition], edges=filtered_edges, origin=self._origin,
-                                     destination=self._destination, node_id=self._node_id)
+        if self._edge_table is not None:
+            table = self._edge_table
+            mask = pc.and_(arrow.is_in(table[self._origin], ids_to_keep),
+                                   arrow.is_in(table[self._destination], ids_to_keep))
+            return self._with_edges(table.filter(mask), nodes=self._nodes[condition])
 
-    def filter_edges(self, condition: pd.Series):
-        if self._edges.shape[0] != condition.shape[0]:
+        if self._ids_encoded:
+            node_mask = self._nodes.index.isin(ids_to_keep)
+            adjacency = self.adjacency
+            edge_mask = node_mask[adjacency.origin_codes] & node_mask[adjacency.destination_codes]
+        else:
+            edge_mask = self._edges[self._origin].isin(ids_to_keep) & self._edges[self._destination].isin(ids_to_keep)
+        return self._with_edges(self._edges[edge_mask], nodes=self._nodes[condition])
+
+    def filter_edges(self, condition):
+        """Keep edges where the condition is True.
+
+        The condition is a boolean Series or array with one value per edge, the arrow edge backend
+        also accepts pyarrow boolean arrays and pyarrow.compute expressions, e.g. pc.field('fare') > 0.
+        """
+        if isinstance(condition, pc.Expression):
+            if self._edge_table is None:
+                raise TypeError('Arrow expressions are supported only by the arrow edge backend')
+            return self._with_edges(self._edge_table.filter(condition))
+
+        edge_count = self.shape()[1]
+        if edge_count != len(condition):
             msg = 'Number of edges {edges} is different from the length of the condition array {condition}'.format(
-                edges=self._edges.shape[0], condition=condition.shape[0])
+                edges=edge_count, condition=len(condition))
             raise ValueError(msg)
 
-        filtered_edges = self._edges[condition]
-        return SpatioTemporalNetwork(nodes=self._nodes, edges=filtered_edges, origin=self._origin,
-                                     destination=self._destination, node_id=self._node_id)
+        if self._edge_table is not None:
+            return self._with_edges(self._edge_table.filter(arrow.to_mask(condition)))
+        return self._with_edges(self._edges[condition])
+
+    def to_directory(self, path: str, partition_by: Optional[list] = None, time_column: Optional[str] = None,
+                     freq: Optional[str] = None) -> None:
+        """Write a STTN to a partitioned directory, see sttn.io.write_network and sttn.io.read_network.
+        """
+        from sttn.io import write_network
+        write_network(self, path, partition_by=partition_by, time_column=time_column, freq=freq)
+
+    def to_arrow_ipc(self, path: str) -> None:
+        """Write a STTN to memory-mappable Arrow IPC files, see sttn.io.open_arrow_ipc.
+        """
+        from sttn.io import write_arrow_ipc
+        write_arrow_ipc(self, path)
 
     def to_parquet(self, path: str) -> None:
         """Write a STTN to the Parquet format.
@@ -141,7 +690,13 @@ class SpatioTemporalNetwork:
         import warnings
         warnings.filterwarnings('ignore', message='.*initial implementation of Parquet.*')
 
+        import pyarrow.parquet as pq
+        from sttn.io import with_network_metadata
+
         node_path = f"{path}-nodes.parquet"
         edge_path = f"{path}-edges.parquet"
         self._nodes.to_parquet(node_path)
-        self._edges.to_parquet(edge_path)
+        edges = self._plain_edges() if self._ids_encoded else self._edge_data()
+        table = edges if isinstance(edges, pa.Table) else pa.Table.from_pandas(edges)
+        # column names and the validation checksum let read_parquet restore the network without an id scan
+        pq.write_table(with_network_metadata(table, self), edge_path)
@@ -0,0 +1,105 @@
+"""Spatial indexes over network nodes, built once per nodes GeoDataFrame and cached on the network.
+"""
+from typing import Optional
+
+import numpy as np
+import shapely
+
+# grid cells per node, more cells mean fewer candidate nodes per point
+CELLS_PER_NODE = 16
+GROUP_GEOMETRIES = ('union', 'convex_hull', 'none')
+
+
+def group_geometries(geometries: np.ndarray, group_codes: np.ndarray, groups: int, method: str = 'union',
+                     n_jobs: Optional[int] = None) -> np.ndarray:
+    """Merged geometry of every group of nodes, group codes are 0..groups-1 and -1 for nodes in no group.
+
+    'union' equals GeoDataFrame.dissolve and can run in a process pool, 'convex_hull' is a single vectorized call
+    and 'none' skips the geometry.
+    """
+    if method not in GROUP_GEOMETRIES:
+        raise ValueError('Unknown group geometry {method}, expected one of {methods}'
+                         .format(method=method, methods=GROUP_GEOMETRIES))
+    if method == 'none':
+        return np.full(groups, None, dtype=object)
+
+    grouped = group_codes >= 0
+    geometries, group_codes = np.asarray(geometries, dtype=object)[grouped], group_codes[grouped]
+    order = np.argsort(group_codes, kind='stable')
+    geometries, group_codes = geometries[order], group_codes[order]
+    if method == 'convex_hull':
+        return shapely.convex_hull(shapely.geometrycollections(geometries, indices=group_codes))
+
+    parts = np.split(geometries, np.cumsum(np.bincount(group_codes, minlength=groups))[:-1])
+    if n_jobs is not None and n_jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            unions = list(pool.map(shapely.union_all, parts, chunksize=max(1, groups // (4 * n_jobs))))
+    else:
+        unions = [shapely.union_all(part) for part in parts]
+    return np.array(unions, dtype=object)
+
+
+def node_tree(geometries) -> shapely.STRtree:
+    """STRtree over node geometries, tree positions are node codes."""
+    geometries = np.array(geometries, dtype=object)
+    # prepared geometries make the repeated point-in-polygon and intersection tests much cheaper
+    shapely.prepare(geometries)
+    return shapely.STRtree(geometries)
+
+
+def touching_pairs(tree: shapely.STRtree) -> np.ndarray:
+    """Codes of distinct node pairs whose geometries share at least a boundary point, both directions."""
+    pairs = tree.query(tree.geometries, predicate='intersects')
+    return pairs[:, pairs[0] != pairs[1]]
+
+
+class PointLocator:
+    """Bulk point-in-polygon lookup of node codes.
+
+    A STRtree over the node geometries assigns candidate nodes to the cells of a regular grid over the node bounds,
+    so locating a point is a cell lookup plus exact tests against the few candidates of its cell, done on raw
+    coordinates without creating point geometries.
+    """
+
+    def __init__(self, tree: shapely.STRtree):
+        self._tree = tree
+        self._geometries = tree.geometries
+
+        x_min, y_min, x_max, y_max = shapely.total_bounds(self._geometries)
+        cells = max(1, CELLS_PER_NODE * len(self._geometries))
+        width, height = max(x_max - x_min, 1e-12), max(y_max - y_min, 1e-12)
+        cell_size = np.sqrt(width * height / cells)
+        self._origin = np.array([x_min, y_min])
+        self._cell_size = cell_size
+        self._shape = (int(np.ceil(width / cell_size)), int(np.ceil(height / cell_size)))
+
+        cell_x, cell_y = np.meshgrid(np.arange(self._shape[0]), np.arange(self._shape[1]), indexing='ij')
+        cell_boxes = shapely.box(x_min + cell_x.ravel() * cell_size, y_min + cell_y.ravel() * cell_size,
+                                 x_min + (cell_x.ravel() + 1) * cell_size, y_min + (cell_y.ravel() + 1) * cell_size)
+        cell_codes, node_codes = self._tree.query(cell_boxes)
+        # query pairs are sorted by cell, so the candidates of a cell are a CSR row
+        self._indptr = np.zeros(len(cell_boxes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell_codes, minlength=len(cell_boxes)), out=self._indptr[1:])
+        self._candidates = node_codes
+
+    def locate(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Code of the first node containing every point, -1 for points outside of all nodes."""
+        cell_x = np.floor((x - self._origin[0]) / self._cell_size)
+        cell_y = np.floor((y - self._origin[1]) / self._cell_size)
+        in_grid = (cell_x >= 0) & (cell_x < self._shape[0]) & (cell_y >= 0) & (cell_y < self._shape[1])
+        points = np.flatnonzero(in_grid)
+        cells = cell_x[points].astype(np.int64) * self._shape[1] + cell_y[points].astype(np.int64)
+
+        starts = self._indptr[cells]
+        counts = self._indptr[cells + 1] - starts
+        pair_points = np.repeat(points, counts)
+        offsets = np.arange(pair_points.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_nodes = self._candidates[np.repeat(starts, counts) + offsets]
+
+        inside = shapely.intersects_xy(self._geometries[pair_nodes], x[pair_points], y[pair_points])
+        codes = np.full(x.shape[0], len(self._geometries), dtype=np.int64)
+        # the minimum code keeps the first node for points matching several nodes
+        np.minimum.at(codes, pair_points[inside], pair_nodes[inside])
+        codes[codes == len(self._geometries)] = -1
+        return codes
@@ -0,0 +1,106 @@
+from collections.abc import Sequence
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+
+class TimeIndex:
+    """Edge timestamp column sorted once, so time windows are found with a binary search instead of a full scan.
+
+    Window positions are returned in the original edge order, which keeps window results equal to filter_edges.
+    Edges with a missing timestamp never fall into a window.
+    """
+
+    def __init__(self, values: pd.Index):
+        missing = values.isna()
+        if not missing.any() and values.is_monotonic_increasing:
+            self._order = None
+            self._sorted = values
+        else:
+            valid_positions = np.flatnonzero(~missing)
+            order = np.argsort(values.take(valid_positions).to_numpy(), kind='stable')
+            self._order = valid_positions[order]
+            self._sorted = values.take(self._order)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    @property
+    def is_sorted(self) -> bool:
+        return self._order is None
+
+    def start(self):
+        return self._sorted[0] if len(self._sorted) else None
+
+    def end(self):
+        return self._sorted[-1] if len(self._sorted) else None
+
+    def bounds(self, boundaries) -> np.ndarray:
+        """Positions in the sorted column where every boundary would be inserted (left side)."""
+        return self._sorted.searchsorted(boundaries, side='left')
+
+    def positions(self, lower: int, upper: int) -> Union[slice, np.ndarray]:
+        """Edge row positions between two sorted column positions, a slice if the edges are already sorted."""
+        if self._order is None:
+            return slice(lower, upper)
+        return np.sort(self._order[lower:upper])
+
+    def window(self, start=None, end=None) -> Union[slice, np.ndarray]:
+        """Edge row positions with start <= value < end, missing bounds are open."""
+        lower = 0 if start is None else int(self.bounds(start))
+        upper = len(self._sorted) if end is None else int(self.bounds(end))
+        return self.positions(lower, max(lower, upper))
+
+
+class NetworkSnapshots(Sequence):
+    """Sequence of networks for consecutive time windows, created from one sorted time index.
+
+    Window bounds are computed upfront with a single vectorized binary search, the networks themselves are built
+    on access and are not cached. All snapshots share the nodes GeoDataFrame of the source network.
+    Windows start every `freq` aligned to the frequency, a `window` longer than `freq` gives rolling windows.
+    Weekly and monthly frequencies (e.g. 'W', 'MS') start windows at their anchor, e.g. Sundays for 'W'.
+    """
+
+    def __init__(self, network, index: TimeIndex, freq: str, window: Optional[str] = None):
+        self._network = network
+        self._index = index
+        if len(index) == 0:
+            self._starts = pd.DatetimeIndex([])
+        else:
+            self._starts = pd.date_range(_window_start(index.start(), freq), _window_start(index.end(), freq),
+                                         freq=freq)
+        ends = self._starts + to_offset(window or freq)
+        self._lower = index.bounds(self._starts)
+        self._upper = index.bounds(ends)
+
+    @property
+    def starts(self) -> pd.DatetimeIndex:
+        return self._starts
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[position] for position in range(*item.indices(len(self)))]
+        if not -len(self) <= item < len(self):
+            raise IndexError('Snapshot index {item} is out of range'.format(item=item))
+        positions = self._index.positions(self._lower[item], max(self._lower[item], self._upper[item]))
+        return self._network._take_rows(positions)
+
+    def items(self) -> Iterator[Tuple[pd.Timestamp, object]]:
+        """Iterate over (window start, network) pairs."""
+        for position, start in enumerate(self._starts):
+            yield start, self[position]
+
+
+def _window_start(value, freq: str) -> pd.Timestamp:
+    """Start of the window containing the timestamp, windows are aligned to the frequency."""
+    offset = to_offset(freq)
+    try:
+        return pd.Timestamp(value).floor(offset)
+    except ValueError:
+        # non-fixed frequencies like weeks and months can not be floored, their windows start at the anchor
+        return offset.rollback(pd.Timestamp(value).normalize())
@@ -1,35 +1,90 @@
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from haversine import haversine_vector, Unit
 from networkx.algorithms import community
 
 from sttn.network import SpatioTemporalNetwork
 
+DISTANCE_METHODS = ('haversine', 'geodesic', 'euclidean')
+
+
+def edge_centroids(network: SpatioTemporalNetwork, projected: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Origin and destination centroid (x, y) arrays in edge order, taken from the cached node centroids."""
+    centroids = network.node_centroids(projected=projected)
+    adjacency = network.adjacency
+    return centroids[adjacency.origin_codes], centroids[adjacency.destination_codes]
+
 
 def get_edges_with_centroids(network: SpatioTemporalNetwork) -> pd.DataFrame:
-    import warnings
-    warnings.filterwarnings('ignore', message=".*geographic CRS. Results from 'centroid' are likely incorrect.*")
-
-    centroid = network.nodes.centroid
-    centroid_long = centroid.x
-    centroid_long.name = 'long'
-    centroid_lat = centroid.y
-    centroid_lat.name = 'lat'
-    centroids = pd.concat([centroid_long, centroid_lat], axis=1)
-    centroid_from = network.edges.join(centroids, on=network._origin).rename(
-        columns={'long': 'long_from', 'lat': 'lat_from'})
-    centroid_all = centroid_from.join(centroids, on=network._destination).rename(
-        columns={'long': 'long_to', 'lat': 'lat_to'})
-    return centroid_all
-
-
-def add_distance(network: SpatioTemporalNetwork) -> SpatioTemporalNetwork:
-    """Add distance in km between area centroids."""
-    centroid_all = get_edges_with_centroids(network)
-    from_points = list(zip(centroid_all.lat_from, centroid_all.long_from))
-    to_points = list(zip(centroid_all.lat_to, centroid_all.long_to))
-    centroid_all['distance'] = haversine_vector(from_points, to_points, Unit.KILOMETERS)
-    centroid_all.drop(['long_from', 'lat_from', 'long_to', 'lat_to'], axis=1, inplace=True)
-    return SpatioTemporalNetwork(nodes=network.nodes, edges=centroid_all)
+    origin, destination = edge_centroids(network)
+    return network._plain_edges().assign(long_from=origin[:, 0], lat_from=origin[:, 1],
+                                long_to=destination[:, 0], lat_to=destination[:, 1])
+
+
+def add_distance(network: SpatioTemporalNetwork, method: str = 'haversine', column: str = 'distance'
+                 ) -> SpatioTemporalNetwork:
+    """Add distance in km between area centroids.
+
+    Distances are computed once per distinct origin/destination pair and broadcast onto the edges.
+
+    Args:
+        network (SpatioTemporalNetwork): input network
+        method (str): 'haversine' great-circle, 'geodesic' WGS84 ellipsoid (pyproj) or 'euclidean' distance
+            between centroids in the projected centroid CRS
+        column (str): name of the distance column
+
+    Returns:
+        SpatioTemporalNetwork: network with the same nodes and column names, and the distance column
+    """
+    if method not in DISTANCE_METHODS:
+        raise ValueError('Unknown distance method {method}, expected one of {methods}'
+                         .format(method=method, methods=DISTANCE_METHODS))
+    origin_codes, destination_codes, edge_pairs = network.adjacency.unique_pairs(return_inverse=True)
+    distance = _pair_distances(network, origin_codes, destination_codes, method)[edge_pairs]
+
+    edges = network._edge_data()
+    if isinstance(edges, pa.Table):
+        # an existing column is overwritten, as assign does for pandas edges
+        index = edges.schema.get_field_index(column)
+        if index >= 0:
+            edges = edges.set_column(index, column, pa.array(distance))
+        else:
+            edges = edges.append_column(column, pa.array(distance))
+    else:
+        edges = edges.assign(**{column: distance})
+    return network._with_edges(edges)
+
+
+def _pair_distances(network: SpatioTemporalNetwork, origin_codes: np.ndarray, destination_codes: np.ndarray,
+                    method: str) -> np.ndarray:
+    if method == 'euclidean':
+        centroids = network.node_centroids(projected=True)
+        crs = network.centroid_crs()
+        meters = 1.0 if crs is None else crs.axis_info[0].unit_conversion_factor
+        delta = centroids[origin_codes] - centroids[destination_codes]
+        return np.hypot(delta[:, 0], delta[:, 1]) * meters / 1000
+
+    centroids = _geographic_centroids(network)
+    origin, destination = centroids[origin_codes], centroids[destination_codes]
+    if method == 'geodesic':
+        from pyproj import Geod
+        _, _, meters = Geod(ellps='WGS84').inv(origin[:, 0], origin[:, 1], destination[:, 0], destination[:, 1])
+        return meters / 1000
+    return haversine_vector(origin[:, ::-1], destination[:, ::-1], Unit.KILOMETERS)
+
+
+def _geographic_centroids(network: SpatioTemporalNetwork) -> np.ndarray:
+    """Node centroid (longitude, latitude) coordinates."""
+    crs = network.nodes.crs
+    if crs is None or crs.is_geographic:
+        return network.node_centroids()
+    from pyproj import Transformer
+    projected = network.node_centroids(projected=True)
+    transformer = Transformer.from_crs(network.centroid_crs(), 'EPSG:4326', always_xy=True)
+    return np.column_stack(transformer.transform(projected[:, 0], projected[:, 1]))
 
 
 def detect_communities(network: SpatioTemporalNetwork, algo, **kwargs):
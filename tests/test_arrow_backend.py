@@ -0,0 +1,97 @@
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from shapely.geometry import Point
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 1, 2, 1, 2, 3], 'destination': [2, 2, 1, 2, 2, 3], 'value': [1, 2, 4, 8, 16, 32],
+         'key': [1, 2, 1, 1, 1, None]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3], 'geometry': [Point(1, 2), Point(2, 1), Point(3, 1)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+stn_arrow = stn.to_edge_backend('arrow')
+
+
+def test_backend_conversion():
+    assert stn.edge_backend == 'pandas'
+    assert stn_arrow.edge_backend == 'arrow'
+    assert stn_arrow.shape() == (3, 6)
+    assert stn_arrow.to_edge_backend('arrow') is stn_arrow
+    assert_frame_equal(stn_arrow.to_edge_backend('pandas').edges, edges_pd)
+
+    from_table = SpatioTemporalNetwork(nodes=nodes_gpd, edges=pa.Table.from_pandas(edges_pd))
+    assert from_table._edges is None
+    assert_frame_equal(from_table.edges, edges_pd)
+
+    with pytest.raises(ValueError):
+        stn.to_edge_backend('polars')
+
+
+def test_arrow_edges_frame_is_network_data():
+    network = stn.to_edge_backend('arrow')
+    network.edges['hour'] = network.edges['value'] % 3
+    assert network.edge_backend == 'pandas'
+    aggregated = network.agg_parallel_edges({'value': 'sum'}, key='hour')
+    expected = edges_pd.assign(hour=edges_pd['value'] % 3).groupby(
+        ['origin', 'destination', 'hour'], as_index=False).agg({'value': 'sum'})
+    assert_frame_equal(aggregated.edges, expected)
+
+
+def test_arrow_validation():
+    with pytest.raises(KeyError):
+        SpatioTemporalNetwork(nodes=nodes_gpd, edges=pa.table({'origin': [1, 4], 'destination': [1, 2]}))
+    with pytest.raises(TypeError):
+        SpatioTemporalNetwork(nodes=nodes_gpd, edges=pa.table({'origin': ['1'], 'destination': ['2']}))
+    with pytest.raises(KeyError):
+        SpatioTemporalNetwork(nodes=nodes_gpd, edges=pa.table({'from': [1], 'destination': [2]}))
+
+
+def test_arrow_filters():
+    condition = stn.edges['value'] > 2
+    assert_frame_equal(stn_arrow.filter_edges(condition).edges, stn.filter_edges(condition).edges.reset_index(drop=True))
+    expression = stn_arrow.filter_edges(pc.field('value') > 2)
+    assert expression.edge_backend == 'arrow'
+    assert list(expression.edges['value']) == [4, 8, 16, 32]
+    with pytest.raises(TypeError):
+        stn.filter_edges(pc.field('value') > 2)
+
+    node_condition = stn.nodes.index != 1
+    filtered = stn_arrow.filter_nodes(node_condition)
+    assert filtered.edge_backend == 'arrow'
+    assert_frame_equal(filtered.edges, stn.filter_nodes(node_condition).edges.reset_index(drop=True))
+
+
+@pytest.mark.parametrize('column_aggs', [{'value': 'sum'}, {'value': 'sum', 'key': 'sum'},
+                                         {'value': 'mean', 'key': 'nunique'}, {'value': 'std'},
+                                         {'value': 'first'}])
+def test_arrow_agg_parallel_edges(column_aggs):
+    aggregated = stn_arrow.agg_parallel_edges(column_aggs=column_aggs)
+    expected = stn.agg_parallel_edges(column_aggs=column_aggs)
+    assert_frame_equal(aggregated.edges, expected.edges, check_dtype=False)
+
+    value_aggs = {'value': column_aggs['value']}
+    with_key = stn_arrow.agg_parallel_edges(column_aggs=value_aggs, key='key')
+    expected_with_key = stn.agg_parallel_edges(column_aggs=value_aggs, key='key')
+    assert_frame_equal(with_key.edges, expected_with_key.edges, check_dtype=False)
+
+
+def test_arrow_agg_adjacent_edges():
+    for outgoing in [True, False]:
+        for include_cycles in [True, False]:
+            aggregated = stn_arrow.agg_adjacent_edges(aggs={'value': 'sum'}, outgoing=outgoing,
+                                                      include_cycles=include_cycles)
+            expected = stn.agg_adjacent_edges(aggs={'value': 'sum'}, outgoing=outgoing,
+                                              include_cycles=include_cycles)
+            assert_frame_equal(aggregated, expected)
+
+
+def test_arrow_degree():
+    assert_series_equal(stn_arrow.degree(weight='value'), stn.degree(weight='value'))
+    assert_series_equal(stn_arrow.degree(unique_neighbors=True), stn.degree(unique_neighbors=True))
@@ -0,0 +1,33 @@
+import networkx as nx
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+from shapely.geometry import Point
+from sttn.algorithms.centrality import pagerank
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 1, 2, 1, 3, 4, 3], 'destination': [2, 2, 1, 3, 1, 1, 3], 'value': [1, 2, 4, 8, 16, 1, 2]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3, 4], 'geometry': [Point(1, 2), Point(2, 1), Point(3, 1), Point(1, 1)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+@pytest.mark.parametrize('weight', [None, 'value'])
+def test_pagerank_matches_networkx(weight):
+    ranks = pagerank(stn, weight=weight)
+    expected = nx.pagerank(stn.to_multigraph(), weight=weight)
+    assert list(ranks.index) == [1, 2, 3, 4]
+    assert ranks.sum() == pytest.approx(1.0)
+    for node_id, value in expected.items():
+        assert ranks[node_id] == pytest.approx(value, abs=1e-6)
+
+
+def test_pagerank_isolated_nodes():
+    with_isolated = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd[edges_pd.origin != 4])
+    ranks = pagerank(with_isolated)
+    assert list(ranks.index) == [1, 2, 3, 4]
+    assert ranks.sum() == pytest.approx(1.0)
+    assert ranks[4] == ranks.min()
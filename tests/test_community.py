@@ -0,0 +1,39 @@
+import pandas as pd
+import geopandas as gpd
+import pycombo
+import pytest
+
+from shapely.geometry import Point
+from sttn.algorithms.community import combo_communities
+from sttn.algorithms.community.detection import collapse_parallel_edges
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 1, 2, 2, 3, 4, 4, 5, 6, 6, 1, 4], 'destination': [2, 2, 3, 1, 1, 5, 5, 6, 4, 4, 4, 1],
+         'value': [1, 2, 4, 8, 16, 1, 2, 3, 5, 7, 1, 1]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3, 4, 5, 6, 7], 'geometry': [Point(i, i) for i in range(7)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+def test_collapse_parallel_edges():
+    graph = collapse_parallel_edges(stn)
+    assert graph.number_of_edges() == 9
+    assert graph[1][2]['weight'] == 2
+    weighted = collapse_parallel_edges(stn, weight='value')
+    assert weighted[6][4]['weight'] == 12
+
+
+@pytest.mark.parametrize('weight', [None, 'value'])
+def test_combo_communities(weight):
+    with_clusters, modularity = combo_communities(stn, weight=weight)
+    _, expected_modularity = pycombo.execute(stn.to_multigraph(), weight=weight, random_seed=0)
+    assert modularity == pytest.approx(expected_modularity)
+
+    clusters = with_clusters.nodes['cluster']
+    assert clusters[1] == clusters[2] == clusters[3]
+    assert clusters[4] == clusters[5] == clusters[6]
+    assert clusters[1] != clusters[4]
+    # nodes without edges are not assigned to a community
+    assert pd.isna(clusters[7])
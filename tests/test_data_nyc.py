@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from pandas.testing import assert_frame_equal
+
+from shapely.geometry import Point
+from sttn.data import nyc
+from sttn.data.nyc import NycTaxiDataProvider
+
+zones = gpd.GeoDataFrame({'OBJECTID': np.arange(1, 264), 'zone': ['zone'] * 263,
+                          'geometry': [Point(i, i) for i in range(263)]}, crs="EPSG:4326")
+trips = pd.DataFrame({
+    'VendorID': [1, 2, 1, 2, 1, 2],
+    'tpep_pickup_datetime': pd.to_datetime(['2023-01-01 10:00', '2023-01-15 08:00', '2022-12-31 23:00',
+                                            '2023-01-20 09:00', '2023-01-31 23:59', '2023-01-05 12:00']),
+    'passenger_count': [1.0, 2.0, 1.0, np.nan, 3.0, 1.0],
+    'PULocationID': np.array([1, 263, 5, 10, 7, 264], dtype=np.int32),
+    'DOLocationID': np.array([2, 100, 5, 12, 7, 3], dtype=np.int32),
+    'fare_amount': [10.0, 25.5, 7.0, 8.0, 12.0, 9.0],
+})
+
+
+def _provider(tmp_path, monkeypatch):
+    trip_file = str(tmp_path / 'yellow_tripdata_2023-01.parquet')
+    trips.to_parquet(trip_file)
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_file', lambda self, url, local_filename=None: trip_file)
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_dir', lambda self: str(tmp_path))
+    monkeypatch.setattr(nyc.gpd, 'read_file', lambda *args, **kwargs: zones)
+    return NycTaxiDataProvider()
+
+
+def test_taxi_scan_pushdown(tmp_path, monkeypatch):
+    network = _provider(tmp_path, monkeypatch).get_data('yellow', '2023-01')
+    expected = pd.DataFrame({'origin': [1, 263, 7], 'destination': [2, 100, 7],
+                             'time': pd.to_datetime(['2023-01-01 10:00', '2023-01-15 08:00', '2023-01-31 23:59']),
+                             'passenger_count': np.array([1, 2, 3], dtype=np.int16),
+                             'fare_amount': [10.0, 25.5, 12.0]})
+    assert not network.ids_encoded
+    assert_frame_equal(network.edges, expected, check_dtype=False)
+    assert network.edges['origin'].dtype == np.int64
+    assert network.edges['passenger_count'].dtype == np.int16
+    assert network.nodes.index.name == 'id' and network.nodes.shape[0] == 263
+
+
+def test_taxi_month_range_and_types(tmp_path, monkeypatch):
+    downloaded = []
+
+    def cache_file(self, url, local_filename=None):
+        file_name = url.split('/')[-1]
+        if '_tripdata_' not in file_name:
+            return url
+        downloaded.append(file_name)
+        taxi_type, month = file_name[:-len('.parquet')].split('_tripdata_')
+        month_trips = trips.assign(tpep_pickup_datetime=trips['tpep_pickup_datetime'] + pd.DateOffset(
+            months=int(month[-2:]) - 1))
+        path = str(tmp_path / file_name)
+        if taxi_type == 'green':
+            month_trips = month_trips.rename(columns={'tpep_pickup_datetime': 'lpep_pickup_datetime'}).assign(
+                fare_amount=month_trips['fare_amount'] * 2)
+        month_trips.to_parquet(path)
+        return path
+
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_file', cache_file)
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_dir', lambda self: str(tmp_path))
+    monkeypatch.setattr(nyc.gpd, 'read_file', lambda *args, **kwargs: zones)
+    network = NycTaxiDataProvider().get_data(['yellow', 'green'], month_range=('2023-01', '2023-02'), max_workers=2)
+    assert sorted(downloaded) == ['green_tripdata_2023-01.parquet', 'green_tripdata_2023-02.parquet',
+                                  'yellow_tripdata_2023-01.parquet', 'yellow_tripdata_2023-02.parquet']
+    edges = network.edges
+    assert list(edges['taxi_type'].cat.categories) == ['yellow', 'green']
+    # the shifted 2022-12-31 trip of the February files falls into January
+    assert edges.groupby('taxi_type', observed=True).size().tolist() == [7, 7]
+    assert (edges[edges['taxi_type'] == 'green']['fare_amount'].sum() ==
+            2 * edges[edges['taxi_type'] == 'yellow']['fare_amount'].sum())
+    assert 'taxi_type' not in NycTaxiDataProvider().get_data('yellow', month_range=('2023-01', '2023-01')).edges
+
+
+def test_geometry_cache(tmp_path, monkeypatch):
+    provider = _provider(tmp_path, monkeypatch)
+    reads = []
+    monkeypatch.setattr(nyc.gpd, 'read_file', lambda *args, **kwargs: reads.append(args) or zones.to_crs(2263))
+    first = provider.cache_geometry(nyc.TAXI_ZONE_SHAPE_URL)
+    second = provider.cache_geometry(nyc.TAXI_ZONE_SHAPE_URL)
+    assert len(reads) == 1
+    assert second.crs == 'EPSG:4326'
+    assert_frame_equal(first, second)
+
+
+def test_taxi_type_schemas(tmp_path, monkeypatch):
+    fhvhv_trips = pd.DataFrame({
+        'hvfhs_license_num': ['HV0003', 'HV0005', 'HV0003'],
+        'pickup_datetime': pd.to_datetime(['2023-01-03 10:00', '2023-01-04 11:00', '2023-02-02 10:00']),
+        'PULocationID': np.array([4, 5, 6], dtype=np.int64),
+        'DOLocationID': np.array([5, 6, 7], dtype=np.int64),
+        'base_passenger_fare': [15.0, 20.0, 30.0],
+        'tips': [1.0, 0.0, 2.0],
+    })
+    fhvhv_file = str(tmp_path / 'fhvhv_tripdata_2023-01.parquet')
+    fhvhv_trips.to_parquet(fhvhv_file)
+    trip_file = str(tmp_path / 'yellow_tripdata_2023-01.parquet')
+    trips.to_parquet(trip_file)
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_file', lambda self, url, local_filename=None: fhvhv_file if
+                        'fhvhv' in url else trip_file)
+    monkeypatch.setattr(NycTaxiDataProvider, 'cache_dir', lambda self: str(tmp_path))
+    monkeypatch.setattr(nyc.gpd, 'read_file', lambda *args, **kwargs: zones)
+
+    fhvhv = NycTaxiDataProvider().get_data('fhvhv', '2023-01').edges
+    assert list(fhvhv.columns) == ['origin', 'destination', 'time', 'passenger_count', 'fare_amount']
+    assert fhvhv['fare_amount'].tolist() == [15.0, 20.0]
+    assert fhvhv['passenger_count'].isna().all()
+
+    mixed = NycTaxiDataProvider().get_data(['yellow', 'fhvhv'], '2023-01').edges
+    assert mixed.groupby('taxi_type', observed=True).size().tolist() == [3, 2]
+    assert mixed['origin'].tolist() == [1, 263, 7, 4, 5]
@@ -0,0 +1,118 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sttn.data.data_provider import DataProvider
+
+CONTENT = bytes(range(256)) * 41
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Static file server stand-in with ETag and single byte range support."""
+    requests = []
+    ranges = True
+    content = CONTENT
+
+    def _send(self, body: bool) -> None:
+        content = type(self).content
+        etag = '"v{size}"'.format(size=len(content))
+        requested = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        type(self).requests.append((self.command, requested))
+        start, end = 0, len(content) - 1
+        partial = self.ranges and requested is not None and if_range in (None, etag)
+        if partial:
+            first, last = requested[len('bytes='):].split('-')
+            start, end = int(first), int(last) if last else len(content) - 1
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', etag)
+        if self.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if partial:
+            self.send_header('Content-Range', 'bytes {start}-{end}/{size}'.format(start=start, end=end,
+                                                                                size=len(content)))
+        self.end_headers()
+        if body:
+            self.wfile.write(content[start:end + 1])
+
+    def do_HEAD(self):
+        self._send(body=False)
+
+    def do_GET(self):
+        self._send(body=True)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests = []
+    RangeHandler.ranges = True
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{port}/data.bin'.format(port=httpd.server_address[1])
+    httpd.shutdown()
+
+
+class TmpProvider(DataProvider):
+    PART_SIZE = 1000
+
+    def __init__(self, cache_dir):
+        self._cache_dir = cache_dir
+
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_parallel_download_and_manifest(server, tmp_path):
+    provider = TmpProvider(str(tmp_path))
+    path = provider.cache_file(server)
+    assert _read(path) == CONTENT
+    # 10496 bytes in 1000 byte parts
+    assert len([request for request in RangeHandler.requests if request[0] == 'GET']) == 11
+    assert not os.path.exists(path + '.part')
+
+    RangeHandler.requests = []
+    assert provider.cache_file(server) == path
+    assert RangeHandler.requests == []
+
+    # a truncated file does not match the manifest and is downloaded again
+    with open(path, 'wb') as f:
+        f.write(CONTENT[:100])
+    assert _read(provider.cache_file(server)) == CONTENT
+
+
+def test_resume_download(server, tmp_path):
+    provider = TmpProvider(str(tmp_path))
+    provider.PART_SIZE = len(CONTENT)
+    path = os.path.join(str(tmp_path), 'data.bin')
+    with open(path + '.part', 'wb') as f:
+        f.write(CONTENT[:3000])
+    provider._write_json(path + '.part.json', {'etag': '"v10496"', 'size': len(CONTENT), 'part_size': None})
+
+    assert _read(provider.cache_file(server)) == CONTENT
+    assert ('GET', 'bytes=3000-') in RangeHandler.requests
+
+    # a partial download of another file version starts from scratch
+    os.remove(path)
+    with open(path + '.part', 'wb') as f:
+        f.write(b'x' * 3000)
+    provider._write_json(path + '.part.json', {'etag': '"old"', 'size': len(CONTENT), 'part_size': None})
+    assert _read(provider.cache_file(server)) == CONTENT
+
+
+def test_download_without_ranges(server, tmp_path):
+    RangeHandler.ranges = False
+    provider = TmpProvider(str(tmp_path))
+    assert _read(provider.cache_file(server, local_filename='plain.bin')) == CONTENT
+    assert [request for request in RangeHandler.requests if request[0] == 'GET'] == [('GET', None)]
@@ -0,0 +1,65 @@
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from shapely.geometry import Point
+from sttn.incremental import IncrementalNetwork
+from sttn.network import SpatioTemporalNetwork
+
+nodes = {'id': [1, 2, 3], 'geometry': [Point(1, 2), Point(2, 1), Point(3, 3)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+edges_pd = pd.DataFrame({'origin': [1, 1, 2, 3, 1, 2, 2, 3], 'destination': [2, 2, 1, 3, 2, 1, 3, 3],
+                         'key': ['a', 'b', 'a', 'a', 'a', 'a', 'b', 'a'],
+                         'value': [1, 2, 4, 8, 16, 32, 64, 128], 'fare': [1.5, 2.0, 3.0, 1.0, 0.5, 4.0, 2.5, 6.0]})
+column_aggs = {'value': 'sum', 'fare': 'mean', 'key': 'count'}
+
+
+def _feed(aggs=column_aggs, **kwargs):
+    incremental = IncrementalNetwork(nodes_gpd, aggs, **kwargs)
+    for start in range(0, edges_pd.shape[0], 3):
+        incremental.append(edges_pd.iloc[start:start + 3])
+    return incremental
+
+
+def test_incremental_aggregates():
+    incremental = _feed()
+    full = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+    assert incremental.edge_count == 8
+    assert_frame_equal(incremental.parallel_edges(), full.agg_parallel_edges(column_aggs).edges)
+    for outgoing in [True, False]:
+        for include_cycles in [True, False]:
+            assert_frame_equal(incremental.adjacent_edges(outgoing, include_cycles),
+                               full.agg_adjacent_edges(column_aggs, outgoing, include_cycles))
+    assert_frame_equal(incremental.network().edges, edges_pd)
+
+    keyed = _feed({'value': 'sum', 'fare': 'mean'}, key='key', keep_edges=False)
+    minmax = {'value': 'min', 'fare': 'max'}
+    keyed_minmax = IncrementalNetwork(nodes_gpd, minmax, key='key')
+    keyed_minmax.append(edges_pd.iloc[:4])
+    keyed_minmax.append(edges_pd.iloc[4:])
+    assert_frame_equal(keyed_minmax.parallel_edges(), full.agg_parallel_edges(minmax, key='key').edges)
+    assert keyed.aggregated_network().shape() == (3, 5)
+    with pytest.raises(ValueError):
+        keyed.network()
+
+
+def test_incremental_validation():
+    with pytest.raises(ValueError):
+        IncrementalNetwork(nodes_gpd, {'value': 'nunique'})
+
+    incremental = IncrementalNetwork(nodes_gpd, {'value': 'sum'})
+    with pytest.raises(ValueError):
+        incremental.parallel_edges()
+    assert incremental.network().shape() == (3, 0)
+    incremental.append(edges_pd.iloc[:2])
+
+    bad_batch = pd.DataFrame({'origin': [1, 4], 'destination': [2, 2], 'value': [1, 1]})
+    with pytest.raises(KeyError):
+        incremental.append(bad_batch)
+    with pytest.raises(TypeError):
+        incremental.append(bad_batch.astype({'origin': str}))
+    # a rejected batch does not change the aggregates
+    assert incremental.edge_count == 2
+    assert list(incremental.parallel_edges()['value']) == [3]
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pandas as pd
+import geopandas as gpd
+import pyarrow.dataset as ds
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from shapely.geometry import Point
+from sttn.io import MANIFEST_FILE, _open_edges, open_arrow_ipc, read_network, read_parquet
+from sttn.network import SpatioTemporalNetwork
+
+times = pd.to_datetime(['2023-01-01 10:30', '2023-01-02 08:10', '2023-01-02 09:00', '2023-01-03 08:59'])
+edges = {'ORIGIN': [1, 1, 2, 2], 'DESTINATION': [2, 2, 1, 2], 'time': times, 'value': [1, 2, 4, 8]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'ID': [1, 2], 'geometry': [Point(1, 2), Point(2, 1)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('ID')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd, origin='ORIGIN', destination='DESTINATION',
+                            node_id='ID')
+
+
+def _sorted(frame):
+    return frame.sort_values(list(frame.columns)).reset_index(drop=True)
+
+
+def test_network_directory(tmp_path):
+    path = str(tmp_path / 'network')
+    stn.to_directory(path, partition_by=['ORIGIN'], time_column='time', freq='D')
+
+    network = read_network(path)
+    assert network._origin == 'ORIGIN' and network._node_id == 'ID'
+    assert_frame_equal(_sorted(network.edges), edges_pd)
+    assert_frame_equal(network.nodes, nodes_gpd)
+
+    day = read_network(path, columns=['value'], filter=(ds.field('time') >= pd.Timestamp('2023-01-02')) & (
+            ds.field('ORIGIN') == 2), backend='arrow')
+    assert day.edge_backend == 'arrow'
+    assert list(day.edges.columns) == ['ORIGIN', 'DESTINATION', 'value']
+    assert _sorted(day.edges)['value'].tolist() == [4, 8]
+
+    with pytest.raises(KeyError):
+        read_network(path, columns=['fare'])
+    with pytest.raises(ValueError):
+        stn.to_directory(path, freq='D')
+
+
+def test_network_directory_time_partitions(tmp_path):
+    path = str(tmp_path / 'network')
+    stn.to_directory(path, time_column='time', freq='D')
+    with open(os.path.join(path, MANIFEST_FILE)) as manifest_file:
+        dataset = _open_edges(path, json.load(manifest_file))
+
+    time_filter = ds.field('time_partition') >= pd.Timestamp('2023-01-02')
+    assert len(list(dataset.get_fragments())) == 3
+    assert len(list(dataset.get_fragments(filter=time_filter))) == 2
+    network = read_network(path, filter=time_filter & (ds.field('time') >= pd.Timestamp('2023-01-02 09:00')))
+    assert list(network.edges.columns) == list(edges_pd.columns)
+    assert _sorted(network.edges)['value'].tolist() == [4, 8]
+
+
+def test_network_directory_overwrite(tmp_path):
+    path = str(tmp_path / 'network')
+    stn.to_directory(path, partition_by=['ORIGIN'])
+    single = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd.iloc[[2]].reset_index(drop=True),
+                                   origin='ORIGIN', destination='DESTINATION', node_id='ID')
+    single.to_directory(path, partition_by=['ORIGIN'])
+    assert_frame_equal(read_network(path).edges, single.edges)
+
+
+def test_network_directory_unpartitioned(tmp_path):
+    path = str(tmp_path / 'network')
+    encoded = stn.encode_ids()
+    encoded.to_directory(path)
+    assert_frame_equal(read_network(path).edges, edges_pd)
+
+
+def test_parquet_metadata(tmp_path, monkeypatch):
+    path = str(tmp_path / 'network')
+    stn.to_parquet(path)
+
+    validated = []
+    original = SpatioTemporalNetwork._validate_ids
+    monkeypatch.setattr(SpatioTemporalNetwork, '_validate_ids',
+                        staticmethod(lambda *args: validated.append(True) or original(*args)))
+    network = read_parquet(path)
+    assert not validated
+    assert (network._origin, network._destination, network._node_id) == ('ORIGIN', 'DESTINATION', 'ID')
+    assert_frame_equal(network.edges, edges_pd)
+    read_parquet(path, validate=True)
+    assert validated
+
+    # nodes changed after the edges were written, the checksum does not match anymore
+    nodes_gpd.iloc[:1].to_parquet(path + '-nodes.parquet')
+    with pytest.raises(KeyError):
+        read_parquet(path)
+
+
+def test_unvalidated_network_is_validated_on_read(tmp_path):
+    invalid = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd.assign(DESTINATION=[2, 2, 1, 3]),
+                                    origin='ORIGIN', destination='DESTINATION', node_id='ID', validate=False)
+    assert not invalid.ids_validated and not invalid.filter_edges(edges_pd['value'] > 1).ids_validated
+    assert stn.ids_validated and stn.agg_parallel_edges({'value': 'sum'}).ids_validated
+
+    path = str(tmp_path / 'network')
+    invalid.to_parquet(path)
+    invalid.to_directory(path)
+    invalid.to_arrow_ipc(path)
+    for read in [read_parquet, read_network, open_arrow_ipc]:
+        with pytest.raises(KeyError):
+            read(path)
+    assert not read_parquet(path, validate=False).ids_validated
+
+
+def test_arrow_ipc(tmp_path):
+    path = str(tmp_path / 'network')
+    stn.encode_ids().to_arrow_ipc(path)
+
+    network = open_arrow_ipc(path)
+    assert network.edge_backend == 'arrow'
+    assert network._node_id == 'ID'
+    assert_frame_equal(network.edges, edges_pd)
+    assert_frame_equal(network.nodes, nodes_gpd)
+    assert network.nodes.crs == nodes_gpd.crs
@@ -0,0 +1,66 @@
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from shapely.geometry import Point
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 1, 2, 1, 2, 3, 3], 'destination': [2, 2, 1, 2, 2, 1, 3], 'value': [1, 2, 4, 8, 16, 32, 64],
+         'key': [1, 2, 1, 1, 1, 2, 2]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3], 'borough': ['a', 'a', 'b'], 'geometry': [Point(1, 2), Point(2, 1), Point(3, 1)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+def test_lazy_filters_match_eager():
+    eager = stn.filter_edges(stn.edges['value'] > 1).filter_nodes(stn.nodes['borough'] == 'a')
+    lazy = stn.lazy().filter_edges(stn.edges['value'] > 1).filter_nodes(stn.nodes['borough'] == 'a').collect()
+    assert_frame_equal(lazy.edges, eager.edges)
+    assert_frame_equal(lazy.nodes, eager.nodes)
+
+
+def test_lazy_chain_with_aggregation():
+    labels = pd.DataFrame(data={'label': [10, 20, 30]}, index=nodes_gpd.index)
+    plan = stn.lazy() \
+        .join_node_labels(labels) \
+        .filter_nodes(lambda n: n['label'] < 30) \
+        .filter_edges(lambda e: e['key'] == 1) \
+        .agg_parallel_edges(column_aggs={'value': 'sum'}) \
+        .filter_edges(lambda e: e['value'] > 5)
+    result = plan.collect()
+
+    expected = pd.DataFrame(data={'origin': [1, 2], 'destination': [2, 2], 'value': [9, 16]}, index=[0, 2])
+    assert_frame_equal(result.edges, expected)
+    assert list(result.nodes.index) == [1, 2]
+    assert list(result.nodes['label']) == [10, 20]
+    assert 'pushed down' in plan.explain()
+
+
+def test_lazy_plan_is_immutable():
+    base = stn.lazy().filter_nodes(stn.nodes['borough'] == 'a')
+    only_cycles = base.filter_edges(stn.edges['origin'] == stn.edges['destination'])
+    assert base.collect().shape() == (2, 5)
+    assert only_cycles.collect().shape() == (2, 1)
+    assert stn.lazy().collect() is stn
+
+
+def test_lazy_condition_errors():
+    with pytest.raises(ValueError):
+        stn.lazy().filter_edges(stn.edges['value'].iloc[:2] > 1).collect()
+    with pytest.raises(ValueError):
+        stn.lazy().filter_nodes(pd.Series([True, False, True], index=[3, 2, 1])).collect()
+
+
+def test_lazy_arrow_series_condition():
+    arrow = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd).to_edge_backend('arrow')
+    condition = edges_pd['value'] > 4
+    result = arrow.lazy().filter_edges(condition).collect()
+    # a series condition does not build the pandas edge frame of the arrow network
+    assert arrow._edges is None
+    assert_frame_equal(result.edges, edges_pd[condition].reset_index(drop=True))
+    with pytest.raises(ValueError):
+        arrow.lazy().filter_edges(condition.set_axis(condition.index + 1)).collect()
@@ -1,3 +1,4 @@
+import networkx as nx
 import pytest
 import pandas as pd
 import geopandas as gpd
@@ -49,3 +50,158 @@ def test_agg_adjacent_edges():
     aggregated_no_cycle = stn.agg_adjacent_edges(aggs={'value': 'sum'}, include_cycles=False)
     expected_no_cycle = pd.DataFrame(data={'origin': [1, 2], 'value': [11, 4]}).set_index('origin')
     assert_frame_equal(aggregated_no_cycle, expected_no_cycle)
+
+    # an aggregate of the grouping column is named after the node id
+    expected_sources = pd.DataFrame(data={'destination': [1, 2], 'id': [1, 1], 'origin': [1, 2]}).set_index(
+        'destination')
+    for network in [stn, stn.to_edge_backend('arrow')]:
+        sources = network.agg_adjacent_edges(aggs={'destination': 'nunique', 'origin': 'nunique'}, outgoing=False)
+        assert_frame_equal(sources, expected_sources)
+
+
+def test_adjacency_index():
+    adjacency = stn.adjacency
+    assert adjacency is stn.adjacency
+    assert adjacency.shape() == (3, 5)
+
+    assert list(adjacency.origin_codes) == [0, 0, 1, 0, 1]
+    assert list(adjacency.out_indptr) == [0, 3, 5, 5]
+    assert list(adjacency.out_edges) == [0, 1, 3, 2, 4]
+    assert list(adjacency.in_indptr) == [0, 1, 5, 5]
+    assert list(adjacency.out_degree()) == [3, 2, 0]
+    assert list(adjacency.in_degree()) == [1, 4, 0]
+
+    assert list(adjacency.adjacent_edges(2, outgoing=False)) == [0, 1, 3, 4]
+    assert list(adjacency.neighbors(2)) == [1, 2]
+    assert list(adjacency.neighbors(1, outgoing=False)) == [2]
+    assert adjacency.neighbors(3).empty
+
+
+def test_degree():
+    assert list(stn.degree()) == [4, 6, 0]
+    assert list(stn.degree(direction='out')) == [3, 2, 0]
+    assert list(stn.degree(direction='in')) == [1, 4, 0]
+    assert list(stn.degree(direction='in', unique_neighbors=True)) == [1, 2, 0]
+    assert list(stn.degree(unique_neighbors=True)) == [2, 4, 0]
+    assert list(stn.degree(direction='out', weight='value')) == [11.0, 20.0, 0.0]
+    assert list(stn.degree().index) == [1, 2, 3]
+
+    graph = nx.DiGraph(stn.to_multigraph())
+    assert dict(graph.degree()) == stn.degree(unique_neighbors=True)[[1, 2]].to_dict()
+
+    with pytest.raises(ValueError):
+        stn.degree(direction='all')
+    with pytest.raises(ValueError):
+        stn.degree(weight='value', unique_neighbors=True)
+
+
+def _assert_valid_ids(network: SpatioTemporalNetwork):
+    assert network.edges['origin'].isin(network.nodes.index).all()
+    assert network.edges['destination'].isin(network.nodes.index).all()
+    assert network.edges['origin'].dtype == network.nodes.index.dtype
+
+
+def test_derived_networks_skip_validation(monkeypatch):
+    validated = []
+    validate_ids = SpatioTemporalNetwork._validate_ids
+
+    def counting_validate_ids(edge_ids, node_index):
+        validated.append(len(edge_ids))
+        validate_ids(edge_ids, node_index)
+
+    monkeypatch.setattr(SpatioTemporalNetwork, '_validate_ids', staticmethod(counting_validate_ids))
+
+    labels = pd.DataFrame(data={'label': ['a', 'b', 'b']}, index=nodes_gpd.index)
+    derived = [
+        stn.filter_edges(stn.edges['value'] > 1),
+        stn.filter_nodes(stn.nodes.index != 1),
+        stn.agg_parallel_edges(column_aggs={'value': 'sum'}),
+        stn.join_node_labels(labels),
+        stn.join_node_labels(labels).group_nodes('label'),
+        stn.filter_edges(stn.edges['value'] > 1).filter_nodes(stn.nodes.index != 2).agg_parallel_edges(
+            column_aggs={'value': 'sum'}),
+    ]
+    assert validated == []
+    for network in derived:
+        _assert_valid_ids(network)
+
+    # edges of nodes without a label can not be relabeled
+    with pytest.raises(KeyError):
+        stn.group_nodes([[1], [3]])
+
+
+def test_validate_false_keeps_type_checks():
+    with pytest.raises(TypeError):
+        SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd.astype({'origin': 'int32'}), validate=False)
+
+
+def test_encoded_ids():
+    encoded = stn.encode_ids()
+    assert encoded.ids_encoded and not stn.ids_encoded
+    assert isinstance(encoded._edges['origin'].dtype, pd.CategoricalDtype)
+    assert encoded.encode_ids() is encoded
+    assert_frame_equal(encoded.decode_ids().edges, edges_pd)
+    assert encoded.ids_encoded
+    assert list(encoded.degree()) == list(stn.degree())
+
+    filtered = encoded.filter_nodes(encoded.nodes.index != 1)
+    assert filtered.ids_encoded
+    assert_frame_equal(filtered.edges, stn.filter_nodes(stn.nodes.index != 1).edges)
+    assert list(filtered.adjacency.origin_codes) == [0]
+
+    aggregated = encoded.agg_parallel_edges(column_aggs={'value': 'sum'})
+    assert aggregated.ids_encoded
+    assert_frame_equal(aggregated.edges, stn.agg_parallel_edges(column_aggs={'value': 'sum'}).edges)
+    assert_frame_equal(encoded.agg_adjacent_edges(aggs={'value': 'sum'}), stn.agg_adjacent_edges(aggs={'value': 'sum'}))
+
+    lazy = encoded.lazy().filter_nodes(encoded.nodes.index != 2).collect()
+    assert_frame_equal(lazy.edges, stn.filter_nodes(stn.nodes.index != 2).edges)
+
+    with pytest.raises(ValueError):
+        SpatioTemporalNetwork(nodes=nodes_gpd.iloc[:2], edges=encoded._edges)
+
+    # the decoded edges frame replaces the encoded edges
+    assert_frame_equal(encoded.edges, edges_pd)
+    assert not encoded.ids_encoded and encoded.edges is encoded._edges
+
+
+def test_edges_frame_is_network_data():
+    for network in [SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd.copy()), stn.encode_ids()]:
+        network.edges['hour'] = network.edges['key'] + 10
+        aggregated = network.agg_parallel_edges({'value': 'sum'}, key='hour')
+        assert list(aggregated.edges['hour']) == [11, 12, 11, 11]
+        assert 'hour' in network.filter_edges(network.edges['value'] > 1).edges
+
+
+def test_group_nodes():
+    labels = pd.DataFrame(data={'label': ['a', 'b', 'b']}, index=nodes_gpd.index)
+    for network in [stn, stn.encode_ids()]:
+        grouped = network.join_node_labels(labels).group_nodes('label')
+        assert grouped.ids_encoded == network.ids_encoded
+        assert list(grouped.nodes.index) == ['a', 'b']
+        assert list(grouped.edges['origin']) == ['a', 'a', 'b', 'a', 'b']
+        assert list(grouped.edges['destination']) == ['b', 'b', 'a', 'b', 'b']
+        assert list(grouped.edges.columns) == list(edges_pd.columns)
+
+
+def test_group_nodes_modes():
+    labels = pd.DataFrame(data={'label': ['b', 'a', 'a'], 'population': [10, 20, 30]}, index=nodes_gpd.index)
+    labeled = stn.join_node_labels(labels)
+    dissolved = labeled.nodes.dissolve(by='label', as_index=False).rename(columns={'label': 'id'}).set_index('id')
+
+    grouped = labeled.group_nodes('label')
+    assert_frame_equal(grouped.nodes, dissolved)
+    assert_frame_equal(labeled.group_nodes('label', n_jobs=2).nodes, dissolved)
+    hulls = labeled.group_nodes('label', geometry='convex_hull').nodes.geometry
+    assert hulls.geom_equals(dissolved.geometry.convex_hull).all()
+    assert labeled.group_nodes('label', geometry='none').nodes.geometry.isna().all()
+    with pytest.raises(ValueError):
+        labeled.group_nodes('label', geometry='envelope')
+
+    column_aggs = {'value': 'sum'}
+    for network in [labeled, labeled.encode_ids(), labeled.to_edge_backend('arrow')]:
+        for key in [None, 'key']:
+            aggregated = network.group_nodes('label', geometry='none', column_aggs=column_aggs, key=key)
+            assert aggregated.ids_encoded == network.ids_encoded
+            expected = grouped.agg_parallel_edges(column_aggs, key=key).edges
+            assert_frame_equal(aggregated.edges, expected)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from shapely.geometry import box
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 1, 2, 3], 'destination': [2, 3, 1, 3], 'value': [1, 2, 4, 8]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3], 'geometry': [box(-74.0, 40.7, -73.99, 40.71), box(-73.99, 40.7, -73.98, 40.72),
+                                       box(-73.9, 40.8, -73.88, 40.81)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+def test_locate():
+    ids = stn.locate([40.705, 40.715, 40.805, 41.0, 40.71], [-73.995, -73.985, -73.89, -73.9, -73.99])
+    assert ids.name == 'id'
+    assert ids.iloc[:3].tolist() == [1, 2, 3]
+    # outside of every node and on the border of nodes 1 and 2
+    assert np.isnan(ids[3]) and ids[4] == 1
+    assert stn.locate([40.705], [-73.995]).dtype == np.int64
+
+    projected = SpatioTemporalNetwork(nodes=nodes_gpd.to_crs(stn.centroid_crs()), edges=edges_pd)
+    assert projected.locate([40.705, 40.805], [-73.995, -73.89]).tolist() == [1, 3]
+
+
+def test_spatial_neighbors():
+    within = stn.nodes_within(1, 1.5)
+    assert within.index.tolist() == [2]
+    np.testing.assert_allclose(within, [1.01], atol=0.01)
+    assert stn.nodes_within(1, 20).index.tolist() == [2, 3]
+
+    nearest = stn.knn(3, 1)
+    assert nearest.index.tolist() == [2] and nearest.name == 'distance'
+    assert stn.knn(3, 5).index.tolist() == [2, 1]
+
+    touching = stn.adjacency_touching()
+    assert stn.adjacency_touching() is touching
+    assert sorted(zip(touching.edges['origin'], touching.edges['destination'])) == [(1, 2), (2, 1)]
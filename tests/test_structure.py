@@ -0,0 +1,69 @@
+import networkx as nx
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+from shapely.geometry import Point
+from sttn.algorithms.structure import average_clustering, clustering, density
+from sttn.network import SpatioTemporalNetwork
+
+edges = {'origin': [1, 2, 3, 1, 2, 4, 3, 5, 5, 2], 'destination': [2, 3, 1, 3, 1, 1, 4, 5, 1, 4],
+         'value': [1, 2, 4, 8, 16, 1, 2, 3, 5, 7]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3, 4, 5, 6], 'geometry': [Point(i, i) for i in range(6)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+# duplicate every edge to check that parallel edges are collapsed
+stn_parallel = SpatioTemporalNetwork(nodes=nodes_gpd, edges=pd.concat([edges_pd, edges_pd.assign(value=0)]))
+
+
+def _digraph() -> nx.DiGraph:
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes_gpd.index)
+    graph.add_weighted_edges_from(edges_pd.itertuples(index=False), weight='value')
+    return graph
+
+
+def _graph() -> nx.Graph:
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes_gpd.index)
+    for origin, destination, value in edges_pd.itertuples(index=False):
+        previous = graph.get_edge_data(origin, destination, default={'value': 0})['value']
+        graph.add_edge(origin, destination, value=previous + value)
+    return graph
+
+
+def test_density():
+    assert density(stn_parallel) == pytest.approx(nx.density(_digraph()))
+    assert density(stn_parallel, directed=False) == pytest.approx(nx.density(_graph()))
+
+
+@pytest.mark.parametrize('weight', [None, 'value'])
+def test_clustering_directed(weight):
+    result = clustering(stn_parallel, weight=weight, directed=True)
+    expected = nx.clustering(_digraph(), weight=weight)
+    assert list(result.index) == [1, 2, 3, 4, 5, 6]
+    for node_id, value in expected.items():
+        assert result[node_id] == pytest.approx(value)
+    assert average_clustering(stn_parallel, weight=weight, directed=True) == pytest.approx(
+        nx.average_clustering(_digraph(), weight=weight))
+
+
+@pytest.mark.parametrize('weight', [None, 'value'])
+def test_clustering_undirected(weight):
+    result = clustering(stn_parallel, weight=weight)
+    expected = nx.clustering(_graph(), weight=weight)
+    for node_id, value in expected.items():
+        assert result[node_id] == pytest.approx(value)
+    assert average_clustering(stn_parallel, weight=weight) == pytest.approx(
+        nx.average_clustering(_graph(), weight=weight))
+
+
+def test_clustering_heaviest_self_loop():
+    loop_edges = pd.DataFrame({'origin': [1, 2, 3, 1], 'destination': [2, 3, 1, 1], 'value': [1, 2, 3, 5]})
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(loop_edges.itertuples(index=False), weight='value')
+    result = clustering(SpatioTemporalNetwork(nodes=nodes_gpd.loc[[1, 2, 3]], edges=loop_edges), weight='value')
+    for node_id, value in nx.clustering(graph, weight='value').items():
+        assert result[node_id] == pytest.approx(value)
@@ -0,0 +1,89 @@
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from shapely.geometry import Point
+from sttn.network import SpatioTemporalNetwork
+
+times = pd.to_datetime(['2023-01-01 10:30', '2023-01-01 08:10', '2023-01-01 09:00', None, '2023-01-01 08:59',
+                        '2023-01-01 10:00'])
+edges = {'origin': [1, 1, 2, 1, 2, 2], 'destination': [2, 2, 1, 2, 2, 1], 'time': times, 'value': [1, 2, 4, 8, 16, 32]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2], 'geometry': [Point(1, 2), Point(2, 1)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+def _filter(start, end):
+    return stn.filter_edges((stn.edges['time'] >= start) & (stn.edges['time'] < end)).edges
+
+
+def test_between():
+    index = stn.time_index('time')
+    assert stn.time_index('time') is index
+    assert not index.is_sorted
+    assert index.start() == pd.Timestamp('2023-01-01 08:10')
+
+    window = stn.between('2023-01-01 08:30', '2023-01-01 10:00')
+    assert_frame_equal(window.edges, _filter('2023-01-01 08:30', '2023-01-01 10:00'))
+    assert list(window.edges['value']) == [4, 16]
+    assert stn.between(end=pd.Timestamp('2023-01-01 08:00')).shape() == (2, 0)
+    assert stn.between().shape() == (2, 5)
+
+    sorted_stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd.dropna().sort_values('time'))
+    assert sorted_stn.time_index('time').is_sorted
+    assert list(sorted_stn.between('2023-01-01 08:30', '2023-01-01 10:00').edges['value']) == [16, 4]
+
+
+def test_between_keeps_adjacency_and_backend():
+    arrow_stn = stn.to_edge_backend('arrow')
+    arrow_stn.adjacency
+    window = arrow_stn.between('2023-01-01 08:30', '2023-01-01 10:01', column='time')
+    assert window.edge_backend == 'arrow'
+    assert list(window.edges['value']) == [4, 16, 32]
+    assert list(window.adjacency.origin_codes) == [1, 1, 1]
+
+
+def test_resample():
+    windows = list(stn.resample('1h', column='time'))
+    assert [start.hour for start, _ in windows] == [8, 9, 10]
+    assert [list(network.edges['value']) for _, network in windows] == [[2, 16], [4], [1, 32]]
+
+
+def test_time_column_required():
+    with pytest.raises(ValueError):
+        SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd).between('2023-01-01')
+
+
+def test_snapshots():
+    snapshots = stn.snapshots('time', freq='1h')
+    assert len(snapshots) == 3
+    assert list(snapshots.starts.hour) == [8, 9, 10]
+    assert all(snapshot.nodes is stn.nodes for snapshot in snapshots)
+    assert [list(snapshot.edges['value']) for snapshot in snapshots] == [[2, 16], [4], [1, 32]]
+    assert list(snapshots[-1].edges['value']) == [1, 32]
+    assert len(snapshots[1:]) == 2
+    with pytest.raises(IndexError):
+        snapshots[3]
+
+    rolling = stn.snapshots('time', freq='1h', window='2h')
+    assert [list(snapshot.edges['value']) for snapshot in rolling] == [[2, 4, 16], [1, 4, 32], [1, 32]]
+
+    half_hours = stn.snapshots('time', freq='30min')
+    assert [snapshot.shape()[1] for snapshot in half_hours] == [1, 1, 1, 0, 1, 1]
+
+
+def test_weekly_and_monthly_snapshots():
+    days = pd.to_datetime(['2023-01-03 10:00', '2023-01-08 00:00', '2023-01-20 23:00', '2022-12-30 12:00'])
+    network = SpatioTemporalNetwork(nodes=nodes_gpd, edges=pd.DataFrame(
+        {'origin': [1, 2, 1, 2], 'destination': [2, 1, 1, 2], 'time': days, 'value': [1, 2, 4, 8]}))
+
+    weeks = network.snapshots('time', freq='W')
+    assert list(weeks.starts) == list(pd.to_datetime(['2022-12-25', '2023-01-01', '2023-01-08', '2023-01-15']))
+    assert [list(week.edges['value']) for week in weeks] == [[8], [1], [2], [4]]
+
+    months = [(start, list(month.edges['value'])) for start, month in network.resample('MS', column='time')]
+    assert months == [(pd.Timestamp('2022-12-01'), [8]), (pd.Timestamp('2023-01-01'), [1, 2, 4])]
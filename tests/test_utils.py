@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from shapely.geometry import box
+from sttn.network import SpatioTemporalNetwork
+from sttn.utils import add_distance, get_edges_with_centroids
+
+edges = {'origin': [1, 1, 2, 3], 'destination': [2, 3, 1, 3], 'value': [1, 2, 4, 8]}
+edges_pd = pd.DataFrame(data=edges)
+
+nodes = {'id': [1, 2, 3], 'geometry': [box(-74.0, 40.7, -73.99, 40.71), box(-73.99, 40.7, -73.98, 40.72),
+                                       box(-73.9, 40.8, -73.88, 40.81)]}
+nodes_gpd = gpd.GeoDataFrame(nodes, crs="EPSG:4326").set_index('id')
+stn = SpatioTemporalNetwork(nodes=nodes_gpd, edges=edges_pd)
+
+
+def test_node_centroids():
+    assert stn.centroid_crs().is_projected
+    centroids = stn.node_centroids()
+    assert stn.node_centroids() is centroids
+    np.testing.assert_allclose(centroids, [[-73.995, 40.705], [-73.985, 40.71], [-73.89, 40.805]], atol=1e-4)
+    # derived networks with the same nodes share the cache
+    assert stn.filter_edges(edges_pd['value'] > 1).node_centroids() is centroids
+
+    with_centroids = get_edges_with_centroids(stn)
+    assert list(with_centroids.columns) == ['origin', 'destination', 'value', 'long_from', 'lat_from', 'long_to',
+                                            'lat_to']
+    np.testing.assert_allclose(with_centroids['lat_to'], centroids[[1, 2, 0, 2], 1])
+
+
+def test_add_distance():
+    distance = add_distance(stn).edges['distance']
+    assert distance[3] == 0
+    np.testing.assert_allclose(distance[:3], [1.01, 14.21, 1.01], atol=0.01)
+
+
+def test_add_distance_methods():
+    renamed = edges_pd.rename(columns={'origin': 'ORIGIN', 'destination': 'DESTINATION'})
+    custom = SpatioTemporalNetwork(nodes=nodes_gpd, edges=renamed, origin='ORIGIN', destination='DESTINATION')
+    haversine = add_distance(custom)
+    assert haversine._origin == 'ORIGIN'
+    assert list(haversine.edges.columns) == ['ORIGIN', 'DESTINATION', 'value', 'distance']
+
+    for method in ['geodesic', 'euclidean']:
+        distance = add_distance(custom, method=method, column='km').edges['km']
+        np.testing.assert_allclose(distance, haversine.edges['distance'], rtol=0.01)
+
+    arrow = add_distance(stn.to_edge_backend('arrow'))
+    assert arrow.edge_backend == 'arrow'
+    again = add_distance(add_distance(stn).to_edge_backend('arrow'))
+    assert again._edge_table.column_names == ['origin', 'destination', 'value', 'distance']
+    np.testing.assert_allclose(arrow.edges['distance'], haversine.edges['distance'])